@@ -1,13 +1,90 @@
 from fastapi import HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from collections import OrderedDict
+import asyncio
+import hashlib
+import json
 import logging
+from typing import Dict
 
 from config.settings import client
 from services.auth import get_current_user as verify_supabase_token
-from config.models import MessageRequest
+from config.models import MessageRequest, BatchMessageRequest
 from config.prompts import get_linkedin_message_prompt
+from config.constants import MESSAGE_BATCH_CONCURRENCY, MESSAGE_CACHE_MAX_ENTRIES
+from services.metrics import track_call
 
 logger = logging.getLogger(__name__)
 
+# Generated messages keyed by (user, recipient, mission)
+message_cache = OrderedDict()
+# Generations in progress by the same key, so repeated recipients share one LLM call
+_pending_messages: Dict[str, asyncio.Future] = {}
+
+def _message_cache_key(user_id: str, recipient, mission: str) -> str:
+    parts = [user_id, recipient.name, recipient.company, recipient.role,
+             recipient.profile_summary, recipient.location, mission]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+async def _generate_message_text(user_id: str, recipient, mission: str, use_cache: bool = True):
+    """Generate (or reuse) the message for one recipient; returns (text, cached)"""
+    key = _message_cache_key(user_id, recipient, mission)
+    while use_cache:
+        if key in message_cache:
+            message_cache.move_to_end(key)
+            return message_cache[key], True
+        pending = _pending_messages.get(key)
+        if pending is None:
+            break
+        try:
+            # Shielded so one waiter going away doesn't cancel the call for the others
+            return await asyncio.shield(pending), True
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise
+            # The request generating it went away; generate it here instead
+    
+    future = asyncio.get_running_loop().create_future()
+    if use_cache:
+        _pending_messages[key] = future
+    try:
+        prompt = get_linkedin_message_prompt(
+            name=recipient.name,
+            company=recipient.company,
+            role=recipient.role,
+            mission=mission,
+            profile_summary=recipient.profile_summary,
+            location=recipient.location
+        )
+        
+        # The OpenAI client is synchronous; keep it off the event loop
+        with track_call("openai", "chat_message"):
+            response = await asyncio.to_thread(
+                client.chat.completions.create,
+                model="gpt-4.1-mini",
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=500,
+                temperature=0.7
+            )
+        
+        message_text = response.choices[0].message.content.strip()
+        message_cache[key] = message_text
+        while len(message_cache) > MESSAGE_CACHE_MAX_ENTRIES:
+            message_cache.popitem(last=False)
+        future.set_result(message_text)
+        return message_text, False
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Mark it retrieved; waiters (if any) still get it
+        future.exception()
+        raise
+    finally:
+        if _pending_messages.get(key) is future:
+            del _pending_messages[key]
+
 async def generate_message(
     request: MessageRequest,
     user: dict = Depends(verify_supabase_token)
@@ -16,23 +93,8 @@ async def generate_message(
     user_id = user["user_id"]
     
     try:
-        prompt = get_linkedin_message_prompt(
-            name=request.name,
-            company=request.company,
-            role=request.role,
-            mission=request.mission,
-            profile_summary=request.profile_summary,
-            location=request.location
-        )
-        
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=500,
-            temperature=0.7
-        )
-        
-        message_text = response.choices[0].message.content.strip()
+        # Always a fresh draft: users call this endpoint to regenerate a message
+        message_text, _ = await _generate_message_text(user_id, request, request.mission, use_cache=False)
         
         logger.info(f"Generated message for user {user_id}")
         
@@ -45,4 +107,35 @@ async def generate_message(
     
     except Exception as e:
         logger.error(f"Error generating message for user {user_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error generating message: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error generating message: {str(e)}")
+
+async def generate_messages_batch(
+    request: BatchMessageRequest,
+    user: dict = Depends(verify_supabase_token)
+):
+    """Generate messages for several recipients concurrently, streaming each as NDJSON when ready"""
+    user_id = user["user_id"]
+    semaphore = asyncio.Semaphore(MESSAGE_BATCH_CONCURRENCY)
+    
+    async def generate_one(index: int, recipient):
+        async with semaphore:
+            result = {"index": index, "recipient": recipient.name, "company": recipient.company}
+            try:
+                result["message"], result["cached"] = await _generate_message_text(user_id, recipient, request.mission)
+            except Exception as e:
+                logger.error(f"Error generating message {index} for user {user_id}: {str(e)}")
+                result["error"] = f"Error generating message: {str(e)}"
+            return result
+    
+    async def stream():
+        tasks = [asyncio.create_task(generate_one(i, r)) for i, r in enumerate(request.recipients)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished) + "\n"
+        finally:
+            # Client went away: don't keep paying for messages nobody will read
+            for task in tasks:
+                task.cancel()
+        logger.info(f"Generated {len(tasks)} batch messages for user {user_id}")
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
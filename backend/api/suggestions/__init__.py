@@ -1,3 +1,3 @@
-from .handlers import get_suggestions
+from .handlers import get_suggestions, get_suggestion_reasoning
 
-__all__ = ['get_suggestions']
\ No newline at end of file
+__all__ = ['get_suggestions', 'get_suggestion_reasoning']
\ No newline at end of file
@@ -1,26 +1,43 @@
-from fastapi import HTTPException, Depends
+from fastapi import HTTPException, Depends, BackgroundTasks
+import asyncio
 import logging
 
 from config.settings import client
 from services.auth import get_current_user as verify_supabase_token
 from config.models import MissionRequest
-from config.prompts import get_instructions
-from config.constants import N_RESULTS
-from services.storage import load_enriched_cache
-from services.search import ConnectionSemanticSearch
-from .processors import format_connections_for_llm, parse_ai_response, enhance_suggestions_with_connection_data
+from config.prompts import get_instructions, get_ranking_response_format
+from config.constants import N_RESULTS, N_SUGGESTIONS, LOCAL_RERANK_ENABLED
+from services.storage import load_enriched_cache, record_suggestion_hits
+from services.search import ConnectionSemanticSearch, mission_cache, connections_fingerprint, rerank_connections, rerank_gap, is_decisive, query_embedding_cache
+from services.enrichment import enrichment_scheduler
+from services.metrics import span, track_call, rerank_gap as rerank_gap_metric
+from .processors import format_connections_for_llm, parse_ai_response, enhance_suggestions_with_connection_data, build_suggestion
+from .reasoning import create_reasoning_job, get_reasoning_job, generate_suggestion_reasoning
 
 logger = logging.getLogger(__name__)
 
+async def get_suggestion_reasoning(
+    reasoning_id: str,
+    user: dict = Depends(verify_supabase_token)
+):
+    """Return deferred reasoning for locally ranked suggestions"""
+    job = await get_reasoning_job(reasoning_id, user["user_id"])
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown reasoning id")
+    return {"reasoning_id": reasoning_id, "status": job["status"], "suggestions": job["suggestions"]}
+
 async def get_suggestions(
     request: MissionRequest,
+    background_tasks: BackgroundTasks = None,
     user: dict = Depends(verify_supabase_token)
 ):
     user_id = user["user_id"]
     
     try:
         # Load enriched cache for this user
-        enriched_cache = await load_enriched_cache(user_id)
+        with span("suggestions", "load_connections"):
+            # Read-only, so repeat requests can reuse the process-local working set
+            enriched_cache = await load_enriched_cache(user_id, read_only=True)
         
         if not enriched_cache:
             raise HTTPException(
@@ -28,15 +45,66 @@ async def get_suggestions(
                 detail="No connections found. Please upload a CSV file first."
             )
         
+        total_enriched = sum(1 for conn in enriched_cache.values() if conn.enriched)
+        
         # Initialize semantic search for this user
-        semantic_search = ConnectionSemanticSearch(user_id)
+        with span("suggestions", "open_collections"):
+            semantic_search = ConnectionSemanticSearch(user_id)
+        
+        # Reuse results of a near-duplicate mission if the connection set is unchanged
+        mission_attributes = None
+        with span("suggestions", "mission_cache"):
+            fingerprint = connections_fingerprint(enriched_cache)
+            mission_embedding = query_embedding_cache.embed([request.mission])[0]
+            cached = mission_cache.lookup(user_id, mission_embedding, fingerprint)
+        
+        if cached and not mission_cache.same_mission(cached, request.mission):
+            # Similar wording alone isn't enough; the extracted attributes have to agree as well
+            with span("suggestions", "extract_attributes"):
+                mission_attributes = semantic_search.extract_mission_attributes(request.mission)
+            if not mission_cache.same_mission(cached, request.mission, mission_attributes):
+                logger.info(f"User {user_id}: cached mission '{cached['mission']}' differs in attributes, not reusing it")
+                cached = None
+        
+        if cached:
+            # A cached answer still counts as a mission and as suggestions shown
+            enrichment_scheduler.bump_for_mission(user_id, request.mission, cached["mission_attributes"])
+            if background_tasks is not None:
+                background_tasks.add_task(
+                    record_suggestion_hits, user_id, [s["linkedin_url"] for s in cached["suggestions"]]
+                )
+            
+            reasoning_id = cached.get("reasoning_id")
+            reasoning_job = await get_reasoning_job(reasoning_id, user_id) if reasoning_id else None
+            return {
+                "mission": request.mission,
+                "mission_attributes": cached["mission_attributes"],
+                "suggestions": cached["suggestions"],
+                "semantic_matches_found": cached["semantic_matches_found"],
+                "using_semantic_search": True,
+                "cached_mission": cached["mission"],
+                "reasoning_id": reasoning_id,
+                "reasoning_pending": bool(reasoning_job and reasoning_job["status"] == "pending"),
+                "total_connections": len(enriched_cache),
+                "enriched_connections": total_enriched,
+                "user_id": user_id
+            }
         
         # Extract mission attributes using LLM
-        mission_attributes = semantic_search.extract_mission_attributes(request.mission)
+        if mission_attributes is None:
+            with span("suggestions", "extract_attributes"):
+                mission_attributes = semantic_search.extract_mission_attributes(request.mission)
         logger.info(f"User {user_id}: Extracted mission attributes: {mission_attributes}")
         
+        # Connections still waiting for enrichment that fit this mission go next
+        enrichment_scheduler.bump_for_mission(user_id, request.mission, mission_attributes)
+        
         # Get top connections using semantic search
-        top_connections = semantic_search.search_top_connections(mission_attributes, n_results=N_RESULTS)
+        with span("suggestions", "semantic_search"):
+            # The summary query is the mission itself, so its embedding is already known
+            top_connections = semantic_search.search_top_connections(
+                mission_attributes, n_results=N_RESULTS, query_embeddings={"summary": mission_embedding}
+            )
         
         if not top_connections:
             raise HTTPException(
@@ -44,38 +112,92 @@ async def get_suggestions(
                 detail="No relevant connections found for your mission."
             )
         
-        # Get full connection data for top matches
-        matched_connections = []
-        for conn in top_connections:
-            full_conn = enriched_cache.get(conn['url'])
-            if full_conn:
-                matched_connections.append(full_conn)
-        
-        # Format connections for LLM processing
-        connections_text = format_connections_for_llm(matched_connections)
-        
-        # Get AI suggestions
-        prompt = get_instructions(request.mission, connections_text)
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=800,
-            temperature=0.1
+        # Re-rank locally on the per-attribute similarities
+        with span("suggestions", "rerank"):
+            reranked = rerank_connections(top_connections, mission_attributes)
+            matched_connections = []
+            for conn in reranked:
+                full_conn = enriched_cache.get(conn['url'])
+                if full_conn:
+                    matched_connections.append(full_conn)
+        
+        # Deferring reasoning needs a background task to write it
+        decisive = (
+            LOCAL_RERANK_ENABLED and background_tasks is not None
+            and len(matched_connections) == len(reranked) and is_decisive(reranked)
         )
-        ai_response = response.choices[0].message.content
-
-        # Parse and enhance AI response
-        suggestions_json = parse_ai_response(ai_response)
-        enhanced_suggestions = enhance_suggestions_with_connection_data(suggestions_json, matched_connections)
         
-        total_enriched = len([conn for conn in enriched_cache.values() if conn.get("enriched", False)])
+        reasoning_id = None
+        suggestions = None
+        if not decisive:
+            # Format connections for LLM processing
+            with span("suggestions", "merge_scores"):
+                connections_text = format_connections_for_llm(matched_connections)
+            
+            # Get AI suggestions
+            prompt = get_instructions(request.mission, connections_text)
+            with span("suggestions", "llm_ranking"), track_call("openai", "chat_ranking"):
+                # The OpenAI client is synchronous; keep it off the event loop
+                response = await asyncio.to_thread(
+                    client.chat.completions.create,
+                    model="gpt-4.1-mini",
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=800,
+                    temperature=0.1,
+                    response_format=get_ranking_response_format(len(connections_text) - 1)
+                )
+            message = response.choices[0].message
+            if getattr(message, "refusal", None):
+                raise ValueError(f"Ranking request was refused: {message.refusal}")
+            
+            # Parse and join AI response back to the candidates by id
+            with span("suggestions", "enhance"):
+                suggestions_json = parse_ai_response(message.content, response.choices[0].finish_reason)
+                # An empty or unknown-id answer is as unusable as a truncated one
+                suggestions = enhance_suggestions_with_connection_data(suggestions_json or [], matched_connections) or None
+                if suggestions is None:
+                    logger.warning(f"User {user_id}: unusable ranking response, falling back to the local order")
+            
+            # How often the LLM agrees with the local top picks at each gap, for tuning the margin
+            gap = rerank_gap(reranked)
+            if suggestions_json and gap is not None and len(matched_connections) == len(reranked):
+                agrees = {item.get("id") for item in suggestions_json} == set(range(1, N_SUGGESTIONS + 1))
+                rerank_gap_metric.observe(gap, agrees=str(agrees).lower())
+        
+        if suggestions is None:
+            # Leaders are clear (or the LLM ranking was unusable): answer now in the local order
+            chosen = matched_connections[:N_SUGGESTIONS]
+            suggestions = [build_suggestion(conn) for conn in chosen]
+            if background_tasks is not None:
+                # Let the LLM write only the reasoning afterwards
+                reasoning_id = await create_reasoning_job(user_id, suggestions)
+                background_tasks.add_task(
+                    generate_suggestion_reasoning, reasoning_id, user_id, request.mission, suggestions, chosen
+                )
+                logger.info(f"User {user_id}: answered from the local re-ranker, deferring reasoning {reasoning_id}")
+        
+        if suggestions and background_tasks is not None:
+            # Frequently suggested profiles get refreshed first
+            background_tasks.add_task(record_suggestion_hits, user_id, [s["linkedin_url"] for s in suggestions])
+        
+        if suggestions:
+            mission_cache.store(
+                user_id, request.mission, mission_embedding, fingerprint,
+                mission_attributes=mission_attributes,
+                top_connections=top_connections,
+                suggestions=suggestions,
+                semantic_matches_found=len(top_connections),
+                reasoning_id=reasoning_id
+            )
         
         return {
             "mission": request.mission,
             "mission_attributes": mission_attributes,
-            "suggestions": enhanced_suggestions if enhanced_suggestions else suggestions_json,
+            "suggestions": suggestions,
             "semantic_matches_found": len(top_connections),
             "using_semantic_search": True,
+            "reasoning_id": reasoning_id,
+            "reasoning_pending": reasoning_id is not None,
             "total_connections": len(enriched_cache),
             "enriched_connections": total_enriched,
             "user_id": user_id
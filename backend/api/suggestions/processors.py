@@ -1,70 +1,104 @@
 import logging
 import json
 import re
+from config.constants import N_RESULTS, RANKING_PROMPT_TOKEN_BUDGET, RANKING_MIN_SUMMARY_TOKENS
 
 logger = logging.getLogger(__name__)
 
-def format_connections_for_llm(matched_connections):
-    """Format matched connections for LLM processing"""
-    connections_text = []
-    for conn in matched_connections[:10]:  # Limit to top 10 for LLM
+CANDIDATE_COLUMNS = "#|name|title|company|location|industry|summary"
+
+# Rough BPE approximation: each word or punctuation mark is about one token
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+def count_tokens(text: str) -> int:
+    """Approximate the number of LLM tokens in a string"""
+    return len(_TOKEN_PATTERN.findall(text or ""))
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text after roughly max_tokens tokens, marking the cut with an ellipsis"""
+    if max_tokens <= 0:
+        return ""
+    for i, match in enumerate(_TOKEN_PATTERN.finditer(text or "")):
+        if i == max_tokens:
+            return text[:match.start()].rstrip() + "…"
+    return text or ""
+
+def _cell(value) -> str:
+    """Make a value safe for a pipe-separated row"""
+    return " ".join(str(value or "").replace("|", "/").split())
+
+def _dedupe_title(headline: str, title: str) -> str:
+    if not title or title.lower() in headline.lower():
+        return headline or title
+    if not headline or headline.lower() in title.lower():
+        return title
+    return f"{headline}; {title}"
+
+def format_connections_for_llm(matched_connections, token_budget: int = RANKING_PROMPT_TOKEN_BUDGET):
+    """Pack matched connections into a compact candidate table within a token budget"""
+    candidates = matched_connections[:N_RESULTS]
+    if not candidates:
+        return [CANDIDATE_COLUMNS]
+    
+    # Spread the budget over the rows actually sent; summaries get whatever each row has left
+    row_budget = token_budget // len(candidates)
+    rows = [CANDIDATE_COLUMNS]
+    for i, conn in enumerate(candidates, start=1):
         name = f"{conn['first_name']} {conn['last_name']}"
-        info = f"{name}: {conn.get('headline', 'N/A')}"
-        
-        if conn.get("summary"):
-            info += f" | Summary: {conn['summary'][:100]}..."
-        if conn.get("company"):
-            info += f" | Company: {conn['company']}"
-        if conn.get("current_company"):
-            info += f" | Current Company: {conn['current_company']}"
-        if conn.get("current_title"):
-            info += f" | Current Title: {conn['current_title']}"
-        if conn.get("location"):
-            info += f" | Location: {conn['location']}"
-        if conn.get("industry"):
-            info += f" | Industry: {conn['industry']}"
+        title = _dedupe_title(conn.get("headline", "") or "", conn.get("current_title", "") or conn.get("position", "") or "")
+        company = conn.get("current_company") or conn.get("company") or ""
         
-        connections_text.append(info)
+        fields = [str(i), name, title, company, conn.get("location", ""), conn.get("industry", "")]
+        row = "|".join(_cell(field) for field in fields)
+        summary_budget = max(RANKING_MIN_SUMMARY_TOKENS, row_budget - count_tokens(row))
+        rows.append(f"{row}|{_cell(truncate_to_tokens(conn.get('summary', '') or '', summary_budget))}")
     
-    return connections_text
+    return rows
+
+def parse_ai_response(ai_response, finish_reason: str = None):
+    """Parse the structured-output ranking response into a list of {id, reasoning, how_they_help}
 
-def parse_ai_response(ai_response):
-    """Parse AI response into structured JSON"""
+    Returns None when the response was cut off or isn't valid JSON, so callers can fall back.
+    """
+    if finish_reason == "length":
+        logger.warning("Ranking response was truncated at max_tokens")
+        return None
     try:
-        return json.loads(ai_response)
-    except json.JSONDecodeError:
-        try:
-            # Try to extract JSON from markdown code block
-            json_pattern = r'```(?:json)?\s*(.*?)\s*```'
-            match = re.search(json_pattern, ai_response, re.DOTALL)
-            if match:
-                json_content = match.group(1).strip()
-                return json.loads(json_content)
-            else:
-                return ai_response
-        except Exception as e:
-            logger.error(f"Error parsing AI response: {e}")
-            return ai_response
+        return json.loads(ai_response)["suggestions"]
+    except (TypeError, ValueError, KeyError) as e:
+        logger.warning(f"Could not parse ranking response: {str(e)}")
+        return None
+
+def build_suggestion(conn, reasoning: str = "", how_they_help: str = ""):
+    """Suggestion payload for one connection, as returned to the client"""
+    return {
+        "name": f"{conn['first_name']} {conn['last_name']}",
+        "role": conn.get("headline") or conn.get("current_title") or conn.get("position", ""),
+        "company": conn.get("current_company") or conn.get("company", ""),
+        "reasoning": reasoning,
+        "how_they_help": how_they_help,
+        "linkedin_url": conn.get("url", ""),
+        "profile_summary": conn.get("summary", ""),
+        "location": conn.get("location", ""),
+        "connection_strength": "Medium"
+    }
 
 def enhance_suggestions_with_connection_data(suggestions_json, matched_connections):
-    """Enhance suggestions with full connection data"""
+    """Join ranked candidate ids back to their full connection data"""
+    # Candidate ids are the 1-based row numbers used in format_connections_for_llm
+    candidates = {i: conn for i, conn in enumerate(matched_connections[:N_RESULTS], start=1)}
+    
     enhanced_suggestions = []
-    if isinstance(suggestions_json, list):
-        for suggestion in suggestions_json:
-            matching_conn = None
-            for conn in matched_connections:
-                conn_name = f"{conn['first_name']} {conn['last_name']}"
-                if suggestion.get("name", "").lower() in conn_name.lower():
-                    matching_conn = conn
-                    break
-            
-            enhanced_suggestion = {
-                **suggestion,
-                "linkedin_url": matching_conn.get("url", "") if matching_conn else "",
-                "profile_summary": matching_conn.get("summary", "") if matching_conn else "",
-                "location": matching_conn.get("location", "") if matching_conn else "",
-                "connection_strength": "Medium"
-            }
-            enhanced_suggestions.append(enhanced_suggestion)
+    seen = set()
+    for suggestion in suggestions_json:
+        conn = candidates.get(suggestion.get("id"))
+        if conn is None or suggestion["id"] in seen:
+            logger.warning(f"Ignoring unknown or repeated candidate id {suggestion.get('id')}")
+            continue
+        seen.add(suggestion["id"])
+        
+        enhanced_suggestions.append(
+            build_suggestion(conn, suggestion.get("reasoning", ""), suggestion.get("how_they_help", ""))
+        )
     
     return enhanced_suggestions
\ No newline at end of file
@@ -0,0 +1,56 @@
+import asyncio
+import logging
+import uuid
+
+from config.settings import client
+from config.prompts import get_reasoning_instructions, get_ranking_response_format
+from config.constants import REASONING_JOB_TTL_HOURS
+from services.metrics import track_call
+from services.search import mission_cache
+from services.storage import create_reasoning_job as store_reasoning_job, update_reasoning_job, load_reasoning_job
+from .processors import format_connections_for_llm, parse_ai_response
+
+logger = logging.getLogger(__name__)
+
+async def create_reasoning_job(user_id: str, suggestions: list) -> str:
+    """Register suggestions whose reasoning text will be written in the background"""
+    # Stored in the database so any worker can answer the poll
+    reasoning_id = uuid.uuid4().hex
+    await store_reasoning_job(reasoning_id, user_id, suggestions, REASONING_JOB_TTL_HOURS)
+    return reasoning_id
+
+async def get_reasoning_job(reasoning_id: str, user_id: str):
+    return await load_reasoning_job(reasoning_id, user_id)
+
+async def generate_suggestion_reasoning(reasoning_id: str, user_id: str, mission: str, suggestions: list,
+                                        chosen_connections: list):
+    """Ask the LLM only for reasoning text and fill it into the already returned suggestions"""
+    try:
+        prompt = get_reasoning_instructions(mission, format_connections_for_llm(chosen_connections))
+        with track_call("openai", "chat_reasoning"):
+            response = await asyncio.to_thread(
+                client.chat.completions.create,
+                model="gpt-4.1-mini",
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=800,
+                temperature=0.1,
+                response_format=get_ranking_response_format(len(chosen_connections))
+            )
+        
+        items = parse_ai_response(response.choices[0].message.content, response.choices[0].finish_reason)
+        if items is None:
+            raise ValueError("Unusable reasoning response")
+        
+        # Suggestion dicts are shared with the mission cache, so fill them in place
+        for item in items:
+            index = item.get("id", 0) - 1
+            if 0 <= index < len(suggestions):
+                suggestions[index]["reasoning"] = item.get("reasoning", "")
+                suggestions[index]["how_they_help"] = item.get("how_they_help", "")
+        await update_reasoning_job(reasoning_id, "completed", suggestions)
+    
+    except Exception as e:
+        logger.error(f"Failed to generate reasoning {reasoning_id}: {str(e)}")
+        # Don't keep serving suggestions without reasoning from the mission cache
+        mission_cache.discard(user_id, mission)
+        await update_reasoning_job(reasoning_id, "failed")
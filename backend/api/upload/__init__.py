@@ -1,3 +1,3 @@
-from .handlers import get_enrichment_progress, upload_csv
+from .handlers import get_enrichment_progress, upload_csv, cancel_user_enrichment
 
-__all__ = ['get_enrichment_progress', 'upload_csv']
\ No newline at end of file
+__all__ = ['get_enrichment_progress', 'upload_csv', 'cancel_user_enrichment']
\ No newline at end of file
@@ -3,7 +3,7 @@ import logging
 
 from config.settings import get_user_enrichment_status
 from services.auth import get_current_user as verify_supabase_token
-from services.enrichment import background_enrichment, vectorization_catchup
+from services.enrichment import background_enrichment, vectorization_catchup, warm_user_caches, cancel_enrichment
 from .validators import validate_csv_file, process_connections_from_df
 from .processors import identify_new_connections, update_connections_cache, analyze_vectorization_status
 
@@ -14,6 +14,13 @@ async def get_enrichment_progress(user: dict = Depends(verify_supabase_token)):
     user_id = user["user_id"]
     return get_user_enrichment_status(user_id)
 
+async def cancel_user_enrichment(user: dict = Depends(verify_supabase_token)):
+    """Stop the user's running enrichment; connections enriched so far are kept"""
+    user_id = user["user_id"]
+    cancelled = cancel_enrichment(user_id)
+    logger.info(f"User {user_id}: enrichment cancel requested (running: {cancelled})")
+    return {"cancelled": cancelled, "user_id": user_id}
+
 async def upload_csv(
     file: UploadFile = File(...), 
     background_tasks: BackgroundTasks = None,
@@ -44,14 +51,20 @@ async def upload_csv(
         
         logger.info(f"User {user_id}: Vectorization status: {total_enriched} enriched, {needs_vectorization} need vectorization")
         
-        # Start background tasks
+        # Start background tasks (they run one after another, in this order)
         will_enrich = len(new_urls_to_enrich)
-        if new_urls_to_enrich and background_tasks:
-            background_tasks.add_task(background_enrichment, new_urls_to_enrich, user_id)
-        
         if unvectorized_connections and background_tasks:
             background_tasks.add_task(vectorization_catchup, unvectorized_connections, user_id)
         
+        if background_tasks:
+            # Searches made while enrichment runs are served warm
+            background_tasks.add_task(warm_user_caches, user_id)
+        
+        if new_urls_to_enrich and background_tasks:
+            background_tasks.add_task(background_enrichment, new_urls_to_enrich, user_id)
+            # Enrichment rewrites connections and the snapshot, so warm them again afterwards
+            background_tasks.add_task(warm_user_caches, user_id)
+        
         return {
             "message": f"Successfully processed {len(new_connections)} connections",
             "count": len(new_connections),
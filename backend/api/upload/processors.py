@@ -40,7 +40,7 @@ async def update_connections_cache(new_connections, enriched_cache, user_id: str
 async def analyze_vectorization_status(enriched_cache, user_id: str): 
     """Check vectorization status for enriched connections"""
     semantic_search = ConnectionSemanticSearch(user_id)
-    all_enriched = [conn for conn in enriched_cache.values() if conn.get("enriched", False)]
+    total_enriched = sum(1 for conn in enriched_cache.values() if conn.get("enriched", False))
     unvectorized_connections = semantic_search.get_unvectorized_connections(enriched_cache)
     
-    return len(all_enriched), unvectorized_connections
\ No newline at end of file
+    return total_enriched, unvectorized_connections
\ No newline at end of file
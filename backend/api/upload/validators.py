@@ -1,6 +1,7 @@
 from fastapi import HTTPException
 import pandas as pd
 import io
+from models.connection import Connection
 
 def validate_csv_file(file, content: bytes):
     """Validate uploaded CSV file format and required columns"""
@@ -25,16 +26,16 @@ def process_connections_from_df(df):
     """Process connections from DataFrame and return valid connections"""
     new_connections = []
     for _, row in df.iterrows():
-        connection = {
-            "first_name": str(row.get("First Name", "")).strip(),
-            "last_name": str(row.get("Last Name", "")).strip(),
-            "url": str(row.get("URL", "")).strip(),
-            "email": str(row.get("Email Address", "")).strip(),
-            "company": str(row.get("Company", "")).strip(),
-            "position": str(row.get("Position", "")).strip(),
-            "connected_on": str(row.get("Connected On", "")).strip(),
-            "enriched": False
-        }
+        connection = Connection(
+            first_name=str(row.get("First Name", "")).strip(),
+            last_name=str(row.get("Last Name", "")).strip(),
+            url=str(row.get("URL", "")).strip(),
+            email=str(row.get("Email Address", "")).strip(),
+            company=str(row.get("Company", "")).strip(),
+            position=str(row.get("Position", "")).strip(),
+            connected_on=str(row.get("Connected On", "")).strip(),
+            enriched=False
+        )
         # Only add if has name and valid URL
         if (connection["first_name"] and connection["last_name"] and 
             connection["url"] and connection["url"].startswith("https://www.linkedin.com/in/")):
@@ -0,0 +1,171 @@
+"""Deterministic local stand-ins for the external services used by the backend.
+
+Nothing here talks to the network: embeddings are feature-hashed token
+vectors, chat completions are rule-based, RapidAPI responses are synthesized
+from the profile URL and Supabase auth accepts any token.
+"""
+import re
+import json
+import math
+import uuid
+import hashlib
+import random
+from types import SimpleNamespace
+from typing import List
+
+import httpx
+
+EMBEDDING_DIM = 256
+
+INDUSTRIES = ["Fintech", "Venture Capital", "Healthcare", "Software", "Retail", "Education", "Energy", "Media"]
+LOCATIONS = ["New York, NY", "San Francisco, CA", "London, UK", "Berlin, Germany", "Austin, TX", "Toronto, Canada"]
+TITLES = ["Investor", "Partner", "Software Engineer", "Product Manager", "Founder", "Data Scientist", "Sales Director", "Designer"]
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises", "Vandelay"]
+
+
+def _stable_int(text: str) -> int:
+    return int(hashlib.md5(text.encode("utf-8")).hexdigest(), 16)
+
+
+def fake_embedding(text: str, dim: int = EMBEDDING_DIM) -> List[float]:
+    """Feature-hashed bag of words, so texts sharing words get similar vectors"""
+    vector = [0.0] * dim
+    tokens = re.findall(r"[a-z0-9]+", (text or "").lower()) or ["empty"]
+    for token in tokens:
+        h = _stable_int(token)
+        vector[h % dim] += 1.0 if (h >> 20) & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class _FakeEmbeddings:
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.calls = 0
+
+    def create(self, model: str, input, **kwargs):
+        self.calls += 1
+        texts = [input] if isinstance(input, str) else input
+        return SimpleNamespace(data=[SimpleNamespace(embedding=fake_embedding(t, self.dim)) for t in texts])
+
+
+class _FakeChatCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, model: str, messages, **kwargs):
+        self.calls += 1
+        prompt = messages[-1]["content"]
+        response_format = kwargs.get("response_format") or {}
+        if "Identify the position, location, and industry" in prompt:
+            content = json.dumps(_extract_attributes(prompt))
+        elif response_format.get("json_schema", {}).get("name") == "candidate_ranking":
+            content = json.dumps({"suggestions": _rank_candidates(prompt)})
+        else:
+            content = "Hi there, it has been a while since we connected. Would you be open to a short call?"
+        message = SimpleNamespace(content=content, role="assistant")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")])
+
+
+def _extract_attributes(prompt: str) -> dict:
+    mission = prompt.split("Mission:")[-1].strip().lower()
+
+    def first_match(options):
+        for option in options:
+            if option.split(",")[0].lower() in mission:
+                return option
+        return "N/A"
+
+    return {"position": first_match(TITLES), "location": first_match(LOCATIONS), "industry": first_match(INDUSTRIES)}
+
+
+def _rank_candidates(prompt: str) -> list:
+    """Pick the first four rows of the candidate table by id"""
+    suggestions = []
+    for line in prompt.splitlines():
+        cells = line.strip().split("|")
+        if len(cells) < 4 or not cells[0].isdigit():
+            continue
+        suggestions.append({
+            "id": int(cells[0]),
+            "reasoning": "Matches the mission attributes.",
+            "how_they_help": "Can make introductions."
+        })
+        if len(suggestions) == 4:
+            break
+    return suggestions
+
+
+class FakeOpenAIClient:
+    """Covers the subset of the OpenAI/Azure client API the backend uses"""
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.embeddings = _FakeEmbeddings(dim)
+        self.chat = SimpleNamespace(completions=_FakeChatCompletions())
+
+
+class FakeSupabaseClient:
+    """Accepts any bearer token and maps it to a stable user id"""
+    def __init__(self):
+        self.auth = SimpleNamespace(get_user=self._get_user)
+
+    @staticmethod
+    def _get_user(token: str):
+        user_id = str(uuid.UUID(int=_stable_int(token) % (1 << 128)))
+        return SimpleNamespace(user=SimpleNamespace(id=user_id, email=f"{user_id[:8]}@example.com"))
+
+
+def fake_profile(url: str) -> dict:
+    """Synthesize a RapidAPI profile payload that is stable for a given URL"""
+    rng = random.Random(_stable_int(url))
+    title = rng.choice(TITLES)
+    industry = rng.choice(INDUSTRIES)
+    company = rng.choice(COMPANIES)
+    location = rng.choice(LOCATIONS)
+    return {
+        "summary": f"{title} at {company} focused on {industry.lower()} in {location}. " * rng.randint(1, 4),
+        "headline": f"{title} | {industry}",
+        "position": [{
+            "companyName": company,
+            "title": title,
+            "companyIndustry": industry,
+            "companyStaffCountRange": rng.choice(["1 - 10", "11 - 50", "51 - 200", "201 - 500", "1001 - 5000"])
+        }],
+        "geo": {"full": location},
+        "educations": [{"schoolName": rng.choice(["MIT", "Stanford", "NYU", "Oxford", "ETH Zurich"])}]
+    }
+
+
+def rapidapi_transport(missing_rate: float = 0.05) -> httpx.MockTransport:
+    """httpx transport answering the RapidAPI profile endpoint locally"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        url = request.url.params.get("url", "")
+        if (_stable_int(url) % 1000) < missing_rate * 1000:
+            return httpx.Response(404, json={"message": "Profile not found"})
+        return httpx.Response(200, json=fake_profile(url))
+    return httpx.MockTransport(handler)
+
+
+def synthetic_linkedin_export(rows: int, seed: int = 0) -> bytes:
+    """LinkedIn connections export with the three preamble lines the uploader skips"""
+    rng = random.Random(seed)
+    first_names = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn"]
+    last_names = ["Smith", "Lee", "Garcia", "Chen", "Patel", "Kim", "Nguyen", "Brown", "Rossi", "Novak"]
+    lines = [
+        "Notes:",
+        '"When exporting your connection data, you may notice that some of the email addresses are missing."',
+        "",
+        "First Name,Last Name,URL,Email Address,Company,Position,Connected On",
+    ]
+    for i in range(rows):
+        first = rng.choice(first_names)
+        last = rng.choice(last_names)
+        company = rng.choice(COMPANIES) if rng.random() > 0.1 else ""
+        position = rng.choice(TITLES) if rng.random() > 0.1 else ""
+        day = rng.randint(1, 28)
+        month = rng.choice(["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"])
+        year = rng.randint(2012, 2025)
+        lines.append(
+            f"{first},{last},https://www.linkedin.com/in/{first.lower()}-{last.lower()}-{i:06d},,"
+            f"{company},{position},{day:02d} {month} {year}"
+        )
+    return ("\n".join(lines) + "\n").encode("utf-8")
@@ -0,0 +1,68 @@
+"""Import-time benchmark for the modules every worker, test and CLI loads.
+
+Run from the backend directory:
+
+    python -m benchmarks.import_time
+
+Each module is imported in a fresh interpreter. The run fails if an import
+exceeds its time budget or pulls in a heavy client library that should only
+be loaded on first use.
+"""
+import sys
+import json
+import argparse
+import subprocess
+
+# Module -> import-time budget in seconds
+IMPORT_BUDGETS = {
+    "config.settings": 0.5,
+    "config.database": 0.5,
+    "services.auth.supabase_auth": 0.5,
+}
+
+# Libraries that must stay lazy (imported by client factories only)
+LAZY_LIBRARIES = ["openai", "chromadb", "supabase", "sqlalchemy.ext.asyncio"]
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, repeat: int = 3) -> dict:
+    """Import a module in fresh interpreters and keep the fastest run"""
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, lazy=LAZY_LIBRARIES)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return min(runs, key=lambda run: run["seconds"])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module, budget in IMPORT_BUDGETS.items():
+        result = measure(module, args.repeat)
+        status = "ok"
+        if result["loaded"]:
+            status = f"FAIL (eagerly imported {', '.join(result['loaded'])})"
+            failed = True
+        elif result["seconds"] > budget:
+            status = f"FAIL (budget {budget:.2f}s)"
+            failed = True
+        print(f"{module:<32} {result['seconds'] * 1000:8.1f} ms  {status}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
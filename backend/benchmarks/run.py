@@ -0,0 +1,273 @@
+"""Offline benchmark suite for the ingestion and suggestion paths.
+
+Run from the backend directory (needs benchmarks/requirements.txt on top of requirements.txt):
+
+    python -m benchmarks.run --rows 1000 --rows 10000
+
+External services are replaced by the deterministic fakes in benchmarks.fakes,
+Postgres by a temporary SQLite database and the Chroma store by a temporary
+directory. Each run is appended to benchmarks/results/history.jsonl and
+compared with the previous run for the same row count; a slowdown beyond
+--tolerance fails the run.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+import statistics
+import subprocess
+from types import SimpleNamespace
+from datetime import datetime, timezone
+
+RESULTS_PATH = os.path.join(os.path.dirname(__file__), "results", "history.jsonl")
+
+MISSIONS = [
+    "Find investors in fintech in New York",
+    "Looking for a product manager in healthcare based in London",
+    "Intro to founders in software around Berlin",
+    "Need a data scientist with energy industry experience",
+    "Partner at a venture capital firm in San Francisco",
+]
+
+
+def install_fakes(workdir: str):
+    """Point every external dependency at a local stand-in"""
+    import chromadb
+    from chromadb.config import Settings
+    from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+    from sqlalchemy.orm import sessionmaker
+
+    from config.providers import get_provider
+    from benchmarks import fakes
+    # Importing these modules registers their providers
+    import config.settings, config.database, services.auth.supabase_auth  # noqa: F401,E401
+
+    openai_client = fakes.FakeOpenAIClient()
+    get_provider("azure_openai").override(openai_client)
+    get_provider("openai").override(openai_client)
+    get_provider("supabase").override(fakes.FakeSupabaseClient())
+    get_provider("chroma").override(chromadb.PersistentClient(
+        path=os.path.join(workdir, "chroma"),
+        settings=Settings(anonymized_telemetry=False)
+    ))
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}")
+    get_provider("database_engine").override(engine)
+    get_provider("database_read_engine").override(engine)
+    get_provider("database_sessionmaker").override(
+        sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    )
+    get_provider("database_read_sessionmaker").override(
+        sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    )
+
+    # RapidAPI answers come from an in-process transport instead of the network
+    import httpx
+    from services.enrichment import profile_fetcher
+    transport = fakes.rapidapi_transport()
+
+    class LocalAsyncClient(httpx.AsyncClient):
+        def __init__(self, *args, **kwargs):
+            kwargs["transport"] = transport
+            super().__init__(*args, **kwargs)
+
+    profile_fetcher.httpx = SimpleNamespace(AsyncClient=LocalAsyncClient)
+    profile_fetcher.RAPIDAPI_KEY = "bench"
+
+    # No real rate limit to respect, and snapshots go to the scratch directory
+    from services.enrichment import pipeline
+    from services.search import snapshot
+    pipeline.RATE_LIMIT_SLEEP_SECONDS = 0
+    snapshot.SNAPSHOT_PATH = os.path.join(workdir, "snapshots")
+
+    return engine, openai_client
+
+
+async def create_schema(engine):
+    from sqlmodel import SQLModel
+    import models  # noqa: F401  (registers tables)
+
+    # The models declare the same tables and indexes as the Postgres migrations
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+
+class _Upload:
+    """Minimal stand-in for fastapi.UploadFile"""
+    def __init__(self, filename: str, content: bytes):
+        self.filename = filename
+        self._content = content
+
+    async def read(self):
+        return self._content
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def run_suite(rows: int, enrich_limit: int, searches: int) -> dict:
+    from benchmarks import fakes
+    from services.auth import get_current_user
+    from api.upload import upload_csv
+    from api.suggestions import get_suggestions
+    from config.models import MissionRequest
+    from fastapi import BackgroundTasks
+    from services.storage import load_enriched_cache
+    from services.enrichment import background_enrichment
+    from services.search import ConnectionSemanticSearch
+
+    credentials = type("Credentials", (), {"credentials": f"bench-token-{rows}"})()
+    user = get_current_user(credentials)
+    user_id = user["user_id"]
+    results = {}
+
+    # 1. CSV upload (parse, diff against stored connections, upsert)
+    export = fakes.synthetic_linkedin_export(rows)
+    start = time.perf_counter()
+    response = await upload_csv(_Upload("connections.csv", export), None, user)
+    elapsed = time.perf_counter() - start
+    results["upload_csv"] = {"seconds": elapsed, "rows_per_second": response["count"] / elapsed}
+
+    # 2. Background enrichment of a bounded slice (RapidAPI is the real-world bottleneck)
+    cache = await load_enriched_cache(user_id)
+    to_enrich = [conn for conn in cache.values() if not conn.get("enriched")][:enrich_limit]
+    start = time.perf_counter()
+    await background_enrichment(to_enrich, user_id)
+    elapsed = time.perf_counter() - start
+    results["background_enrichment"] = {
+        "seconds": elapsed, "profiles": len(to_enrich), "profiles_per_second": len(to_enrich) / elapsed
+    }
+
+    # 3. Bulk vectorization of every connection, enriched with the fake profile payload
+    from services.enrichment import format_enriched_connection
+    enriched = [format_enriched_connection(conn, fakes.fake_profile(conn["url"])) for conn in cache.values()]
+    semantic_search = ConnectionSemanticSearch(user_id)
+    start = time.perf_counter()
+    semantic_search.batch_store_embeddings(enriched)
+    semantic_search.write_snapshot()
+    elapsed = time.perf_counter() - start
+    results["batch_store_embeddings"] = {
+        "seconds": elapsed, "connections": len(enriched), "connections_per_second": len(enriched) / elapsed
+    }
+
+    from services.storage import save_enriched_cache
+    await save_enriched_cache(user_id, {conn["url"]: conn for conn in enriched})
+
+    # 4. Interactive suggestions
+    latencies = []
+    for i in range(searches):
+        start = time.perf_counter()
+        background_tasks = BackgroundTasks()
+        await get_suggestions(MissionRequest(mission=MISSIONS[i % len(MISSIONS)]), background_tasks, user)
+        latencies.append(time.perf_counter() - start)
+        # Deferred reasoning runs after the response, outside the measured latency
+        await background_tasks()
+    results["get_suggestions"] = {
+        "p50_seconds": statistics.median(latencies),
+        "p95_seconds": _percentile(latencies, 95),
+        "max_seconds": max(latencies),
+        "requests": len(latencies)
+    }
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _previous_run(rows: int):
+    if not os.path.exists(RESULTS_PATH):
+        return None
+    previous = None
+    with open(RESULTS_PATH) as f:
+        for line in f:
+            record = json.loads(line)
+            if record["rows"] == rows:
+                previous = record
+    return previous
+
+
+# Metric used to detect regressions for each benchmark and whether higher is better
+REGRESSION_KEYS = {
+    "upload_csv": ("rows_per_second", True),
+    "background_enrichment": ("profiles_per_second", True),
+    "batch_store_embeddings": ("connections_per_second", True),
+    "get_suggestions": ("p95_seconds", False),
+}
+
+
+def compare(current: dict, previous: dict, tolerance: float):
+    regressions = []
+    for name, (key, higher_is_better) in REGRESSION_KEYS.items():
+        old = previous["results"].get(name, {}).get(key)
+        new = current["results"].get(name, {}).get(key)
+        if not old or new is None:
+            continue
+        change = (old - new) / old if higher_is_better else (new - old) / old
+        if change > tolerance:
+            regressions.append(f"{name}.{key}: {old:.4g} -> {new:.4g} ({change:+.0%} worse)")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, action="append", help="Rows in the synthetic export (repeatable)")
+    parser.add_argument("--enrich-limit", type=int, default=500, help="Connections to run through enrichment")
+    parser.add_argument("--searches", type=int, default=20, help="Suggestion requests to time")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before failing")
+    parser.add_argument("--no-record", action="store_true", help="Do not append results to the history file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    failed = False
+
+    for rows in args.rows or [1000]:
+        with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+            engine, _ = install_fakes(workdir)
+
+            async def run():
+                await create_schema(engine)
+                try:
+                    return await run_suite(rows, args.enrich_limit, args.searches)
+                finally:
+                    await engine.dispose()
+
+            results = asyncio.run(run())
+
+        record = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "rows": rows,
+            "python": sys.version.split()[0],
+            "results": results,
+        }
+        print(json.dumps(record, indent=2))
+
+        previous = _previous_run(rows)
+        if previous:
+            regressions = compare(record, previous, args.tolerance)
+            for regression in regressions:
+                print(f"REGRESSION ({rows} rows) {regression}")
+            failed = failed or bool(regressions)
+
+        if not args.no_record:
+            os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+            with open(RESULTS_PATH, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
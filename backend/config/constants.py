@@ -3,16 +3,117 @@ NUMBER_OF_ENRICHMENTS = 10
 RATE_LIMIT_SLEEP_SECONDS = 3.5
 MAX_CONCURRENT_REQUESTS = 5
 N_RESULTS = 10
+N_SUGGESTIONS = 4
+
+# Database pools: interactive reads and background writes never wait on each other's connections
+DB_READ_POOL_SIZE = 5
+DB_READ_MAX_OVERFLOW = 5
+DB_READ_POOL_TIMEOUT_SECONDS = 5  # Fail a request rather than queue it behind a burst
+DB_READ_COMMAND_TIMEOUT_SECONDS = 15
+DB_WRITE_POOL_SIZE = 5
+DB_WRITE_MAX_OVERFLOW = 5
+DB_WRITE_POOL_TIMEOUT_SECONDS = 30
+DB_WRITE_COMMAND_TIMEOUT_SECONDS = 120
+# Sync pool for pgvector (VECTOR_BACKEND = "pgvector"): searches run on it, so fail fast like reads
+DB_VECTOR_POOL_SIZE = 5
+DB_VECTOR_MAX_OVERFLOW = 5
+DB_VECTOR_POOL_TIMEOUT_SECONDS = 5
+DB_VECTOR_COMMAND_TIMEOUT_SECONDS = 30
+
+# Enrichment pipeline (bounded queues between the fetch, embed and persist stages)
+ENRICHMENT_STAGE_QUEUE_SIZE = 20
+ENRICHMENT_PERSIST_BATCH_SIZE = 25
+VECTORIZE_BATCH_SIZE = 32  # Profiles per embedding request (4 texts each)
+VECTORIZE_FLUSH_SECONDS = 2.0  # Longest a profile waits in the vectorization buffer
+ENRICHMENT_SHUTDOWN_TIMEOUT_SECONDS = 20  # How long shutdown waits for fetched profiles to be saved
+
+# Enrichment ordering (most useful connections are enriched first)
+ENRICHMENT_PRIORITY_WEIGHTS = {"recency": 1.0, "position": 1.0, "company": 0.5, "mission_match": 3.0}
+ENRICHMENT_RECENCY_HORIZON_DAYS = 5 * 365  # Connections older than this get no recency boost
+RECENT_MISSIONS_PER_USER = 5
+ENRICHMENT_BUMP_LIMIT = 50  # Pending connections moved to the front per suggestion request
+
+# Local re-ranking (skips the LLM ranking call when the leaders are clearly separated)
+LOCAL_RERANK_ENABLED = True
+# Hand-set, not fitted (there is no labelled ranking data yet): missions mostly name a role, so position
+# counts most, and location is often a preference rather than a requirement
+RERANKER_WEIGHTS = {"summary": 1.0, "position": 1.4, "industry": 1.2, "location": 0.8}
+# Required gap between the last chosen and first rejected score (0-1 scale). A starting value: tune it with
+# the rerank_gap_score metric, which records the gap on LLM-ranked requests and whether the LLM agreed
+RERANK_CONFIDENCE_MARGIN = 0.04
+REASONING_JOB_TTL_HOURS = 24  # Deferred reasoning jobs are pruned after this
+
+# Message generation settings
+MESSAGE_BATCH_CONCURRENCY = 4
+MAX_BATCH_MESSAGE_RECIPIENTS = 20
+MESSAGE_CACHE_MAX_ENTRIES = 2000
+
+# Ranking prompt settings
+RANKING_PROMPT_TOKEN_BUDGET = 1600  # Tokens for the whole candidate table, split across N_RESULTS rows
+RANKING_MIN_SUMMARY_TOKENS = 12
+
+# Shared (cross-user) enrichment cache settings
+PROFILE_CACHE_TTL_DAYS = 30
+SHARED_EMBEDDING_CACHE_ENABLED = True
+SHARED_EMBEDDING_COLLECTION = "shared_text_embeddings"
+
+# Stale profile refresh settings
+REFRESH_ENABLED = True
+REFRESH_INTERVAL_SECONDS = 3600
+REFRESH_MIN_AGE_DAYS = 30
+REFRESH_DAILY_API_BUDGET = 200  # RapidAPI calls per day spent on refreshes, shared by all workers (refresh_budget table)
+REFRESH_BATCH_SIZE = 25
+REFRESH_CANDIDATE_POOL = 500  # Oldest profiles considered before ranking by suggestion frequency
+
+# Database settings
+RUN_MIGRATIONS_ON_STARTUP = True  # Otherwise run `python -m migrations` before deploying
 
 # Environment settings
 TOKENIZERS_PARALLELISM = "false"
 
 # ChromaDB settings
 CHROMA_PERSIST_PATH = "./chroma_data"
+# "per_user": four collections per user; "consolidated": one collection per attribute
+# filtered by user_id (migrate with `python -m services.search.migrate_collections`)
+CHROMA_STORAGE_MODE = "per_user"
+
+# Vector backend: "chroma" (local store plus snapshots) or "pgvector" (connection_embeddings table)
+VECTOR_BACKEND = "chroma"
+PGVECTOR_HNSW_M = 16
+PGVECTOR_HNSW_EF_CONSTRUCTION = 64
+PGVECTOR_CANDIDATES_PER_ATTRIBUTE = 200  # Nearest rows per attribute before exact weighted scoring
+PGVECTOR_EF_SEARCH = 200  # Must be at least PGVECTOR_CANDIDATES_PER_ATTRIBUTE
+PGVECTOR_ITERATIVE_SCAN = "relaxed_order"  # pgvector >= 0.8; set to None on older versions
+
+# Vector snapshot settings (memory-mapped copies of each user's embeddings)
+SNAPSHOT_PATH = "./snapshot_data"
+SNAPSHOT_DTYPE = "float32"  # "float16" halves disk and page cache at a small precision cost
+SNAPSHOT_SCORE_CHUNK_ROWS = 8192
+SHARDED_SCORING_EXECUTOR = "thread"  # "thread", "process" or None to score on the request thread
+SHARDED_SCORING_WORKERS = None  # Defaults to CPU count // WEB_CONCURRENCY; one worker disables sharding
+SHARDED_SCORING_MIN_ROWS = 50000  # Smaller snapshots aren't worth the hand-off
+
+# Semantic mission cache (reuses results for near-duplicate missions)
+# The threshold only picks a candidate; unless the text is identical its extracted
+# position, location and industry must match too, so a hit costs the extraction call
+MISSION_CACHE_SIMILARITY_THRESHOLD = 0.93
+MISSION_CACHE_MAX_ENTRIES_PER_USER = 20
+MISSION_CACHE_MAX_USERS = 1000
+
+# Post-upload warm-up (collections, connections and query embeddings ready before the first search)
+POST_UPLOAD_WARMUP_ENABLED = True
+WARMUP_VALUES_PER_ATTRIBUTE = 15  # Most common position/location/industry values to pre-embed
+QUERY_EMBEDDING_CACHE_MAX_ENTRIES = 2000
+OPEN_COLLECTIONS_MAX = 400  # Chroma collection handles kept open (4 per user in per_user mode)
+
+# Process-local cache of users' connections (read-only paths such as /get-suggestions)
+CONNECTION_CACHE_ENABLED = True
+CONNECTION_CACHE_MAX_USERS = 50
 
 # RapidAPI settings
 RAPIDAPI_HOST = "li-data-scraper.p.rapidapi.com"
 
 # OpenAI model settings
-AZURE_API_VERSION = "2024-02-01"
-EMBEDDING_MODEL = "text-embedding-ada-002"
\ No newline at end of file
+AZURE_API_VERSION = "2024-08-01-preview"  # First version supporting json_schema structured outputs
+EMBEDDING_MODEL = "text-embedding-ada-002"
+EMBEDDING_DIMENSIONS = 1536
\ No newline at end of file
@@ -1,24 +1,136 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, contextmanager
 import os
+import time
 
-# Supabase database URL from environment
-DATABASE_URL = os.getenv("SUPABASE_DB_URL").replace("postgresql://", "postgresql+asyncpg://")
-
-engine = create_async_engine(
-    DATABASE_URL,
-    pool_size=5,
-    max_overflow=10,
-    pool_pre_ping=True,
-    echo=False  # Set to True for SQL debugging
+from .providers import register
+from .constants import (
+    DB_READ_POOL_SIZE,
+    DB_READ_MAX_OVERFLOW,
+    DB_READ_POOL_TIMEOUT_SECONDS,
+    DB_READ_COMMAND_TIMEOUT_SECONDS,
+    DB_WRITE_POOL_SIZE,
+    DB_WRITE_MAX_OVERFLOW,
+    DB_WRITE_POOL_TIMEOUT_SECONDS,
+    DB_WRITE_COMMAND_TIMEOUT_SECONDS,
+    DB_VECTOR_POOL_SIZE,
+    DB_VECTOR_MAX_OVERFLOW,
+    DB_VECTOR_POOL_TIMEOUT_SECONDS,
+    DB_VECTOR_COMMAND_TIMEOUT_SECONDS,
+    VECTOR_BACKEND
 )
 
-AsyncSessionLocal = sessionmaker(
-    engine, class_=AsyncSession, expire_on_commit=False
-)
+def _async_engine(database_url: str, pool: str, pool_size: int, max_overflow: int, pool_timeout: float, command_timeout: float):
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from services.metrics import db_pool_connections
+
+    engine = create_async_engine(
+        database_url.replace("postgresql://", "postgresql+asyncpg://"),
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_pre_ping=True,
+        connect_args={"command_timeout": command_timeout},
+        echo=False  # Set to True for SQL debugging
+    )
+    db_pool_connections.set_function(engine.pool.checkedout, pool=pool)
+    return engine
+
+def _create_engine():
+    # Supabase database URL from environment; writes, background jobs and migrations use the primary
+    return _async_engine(
+        os.getenv("SUPABASE_DB_URL"), "write",
+        DB_WRITE_POOL_SIZE, DB_WRITE_MAX_OVERFLOW, DB_WRITE_POOL_TIMEOUT_SECONDS, DB_WRITE_COMMAND_TIMEOUT_SECONDS
+    )
+
+def _create_read_engine():
+    # Interactive reads get their own pool, on a read replica when one is configured
+    return _async_engine(
+        os.getenv("SUPABASE_DB_READ_URL") or os.getenv("SUPABASE_DB_URL"), "read",
+        DB_READ_POOL_SIZE, DB_READ_MAX_OVERFLOW, DB_READ_POOL_TIMEOUT_SECONDS, DB_READ_COMMAND_TIMEOUT_SECONDS
+    )
+
+def _sessionmaker_for(engine_provider):
+    def factory():
+        from sqlalchemy.ext.asyncio import AsyncSession
+        from sqlalchemy.orm import sessionmaker
+        return sessionmaker(
+            engine_provider.get(), class_=AsyncSession, expire_on_commit=False
+        )
+    return factory
+
+def _create_vector_engine():
+    from sqlalchemy import create_engine
+    from services.metrics import db_pool_connections
+
+    # The embedding interface is synchronous (it runs in worker threads), so pgvector gets its own sync engine
+    database_url = os.getenv("SUPABASE_DB_URL").replace("postgresql://", "postgresql+psycopg://")
+    engine = create_engine(
+        database_url,
+        pool_size=DB_VECTOR_POOL_SIZE,
+        max_overflow=DB_VECTOR_MAX_OVERFLOW,
+        pool_timeout=DB_VECTOR_POOL_TIMEOUT_SECONDS,
+        pool_pre_ping=True,
+        # psycopg has no client-side command timeout; the server-side statement timeout does the same job
+        connect_args={"options": f"-c statement_timeout={int(DB_VECTOR_COMMAND_TIMEOUT_SECONDS * 1000)}"},
+        echo=False
+    )
+    db_pool_connections.set_function(engine.pool.checkedout, pool="vector")
+    return engine
+
+# Engines and session factories are created on first use
+engine = register("database_engine", _create_engine)
+
+read_engine = register("database_read_engine", _create_read_engine)
+
+vector_engine = register("vector_database_engine", _create_vector_engine, when=lambda: VECTOR_BACKEND == "pgvector")
+
+AsyncSessionLocal = register("database_sessionmaker", _sessionmaker_for(engine))
+
+ReadSessionLocal = register("database_read_sessionmaker", _sessionmaker_for(read_engine))
+
+@contextmanager
+def _checkout_timer(pool: str):
+    """Measure the wait for a free connection and count checkouts that time out"""
+    from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+    from services.metrics import db_pool_wait_seconds, db_pool_timeouts
+
+    start = time.perf_counter()
+    try:
+        yield
+    except PoolTimeoutError:
+        db_pool_timeouts.inc(pool=pool)
+        raise
+    finally:
+        db_pool_wait_seconds.observe(time.perf_counter() - start, pool=pool)
+
+@asynccontextmanager
+async def _pooled_session(sessionmaker, pool: str):
+    async with sessionmaker() as session:
+        # Check out up front so the wait for a free connection is measured on its own
+        with _checkout_timer(pool):
+            await session.connection()
+        yield session
 
 @asynccontextmanager
 async def get_session():
-    async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+    """Session on the primary, for writes and background work"""
+    async with _pooled_session(AsyncSessionLocal, "write") as session:
+        yield session
+
+@asynccontextmanager
+async def get_read_session():
+    """Session for interactive reads; may hit a replica, so don't use it to read back your own writes"""
+    async with _pooled_session(ReadSessionLocal, "read") as session:
+        yield session
+
+@contextmanager
+def vector_connection(begin: bool = False):
+    """Connection from the sync pgvector pool (in a transaction with begin=True)"""
+    with _checkout_timer("vector"):
+        conn = vector_engine.connect()
+    with conn:
+        if begin:
+            with conn.begin():
+                yield conn
+        else:
+            yield conn
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List
+from .constants import MAX_BATCH_MESSAGE_RECIPIENTS
 
 class MissionRequest(BaseModel):
     mission: str
@@ -10,3 +12,14 @@ class MessageRequest(BaseModel):
     mission: str
     profile_summary: str = ""
     location: str = ""
+
+class MessageRecipient(BaseModel):
+    name: str
+    company: str
+    role: str
+    profile_summary: str = ""
+    location: str = ""
+
+class BatchMessageRequest(BaseModel):
+    mission: str
+    recipients: List[MessageRecipient] = Field(..., min_length=1, max_length=MAX_BATCH_MESSAGE_RECIPIENTS)
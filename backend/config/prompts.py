@@ -1,30 +1,55 @@
-def get_instructions(mission: str, connections_text: str) -> str:
-    return f"""
-        Mission: {mission}
-
-        LinkedIn Connections (enriched profiles with detailed information):
-        {chr(10).join(connections_text)}
-
-        Based on the mission above and the detailed profile information provided, suggest the top 4 most relevant connections who could help. Use the enriched profile data (summary, location, industry, company info, role) to make intelligent matches.
-
-        For each suggestion, provide:
-        1. Full name
-        2. Current role/headline
-        3. Company or current company
-        4. Why they're relevant (specific reasoning based on their enriched profile data)
-        5. How they could specifically help with this mission, and what makes them a strong connection for this goal
-
-        Return ONLY a valid JSON array with this exact structure:
-        [
-        {{
-            "name": "Full Name",
-            "role": "Current Role/Headline", 
-            "company": "Company or Current Company",
-            "reasoning": "Why they're relevant based on their profile",
-            "how_they_help": "Specific ways they can help with the mission"
-        }}
-        ]
-    """
+from .constants import N_SUGGESTIONS
+
+
+def get_instructions(mission: str, connections_text: list) -> str:
+    # connections_text is the candidate table from format_connections_for_llm (header row first)
+    return f"""Mission: {mission}
+
+Candidates:
+{chr(10).join(connections_text)}
+
+Pick the {N_SUGGESTIONS} candidates best placed to help with the mission, using their profile data. For each, return its # as id, why they're relevant (citing their profile) and specific ways they can help with the mission."""
+
+
+def get_reasoning_instructions(mission: str, connections_text: list) -> str:
+    # Used when the local re-ranker has already chosen the candidates
+    return f"""Mission: {mission}
+
+Chosen connections:
+{chr(10).join(connections_text)}
+
+For each connection, return its # as id, why they're relevant to the mission (citing their profile) and specific ways they can help with the mission."""
+
+
+def get_ranking_response_format(candidate_count: int) -> dict:
+    """Structured-output schema for the ranking call; ids are restricted to the candidate rows"""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "candidate_ranking",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "suggestions": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "id": {"type": "integer", "enum": list(range(1, candidate_count + 1))},
+                                "reasoning": {"type": "string"},
+                                "how_they_help": {"type": "string"}
+                            },
+                            "required": ["id", "reasoning", "how_they_help"],
+                            "additionalProperties": False
+                        }
+                    }
+                },
+                "required": ["suggestions"],
+                "additionalProperties": False
+            }
+        }
+    }
 
 
 def get_linkedin_message_prompt(name: str, company: str, role: str, mission: str, profile_summary: str, location: str) -> str:
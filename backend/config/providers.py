@@ -0,0 +1,70 @@
+import threading
+import logging
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LazyProvider:
+    """Builds a heavy client on first use and forwards attribute access to it"""
+    def __init__(self, name: str, factory: Callable[[], Any], when: Optional[Callable[[], bool]] = None):
+        self._name = name
+        self._factory = factory
+        self._when = when
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    logger.info(f"Initializing {self._name} client")
+                    self._instance = self._factory()
+        return self._instance
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    @property
+    def in_use(self) -> bool:
+        """Whether the configured backends use this client"""
+        return self._when is None or self._when()
+
+    def override(self, instance: Any):
+        """Replace the underlying client (e.g. with a local fake)"""
+        with self._lock:
+            self._instance = instance
+
+    def reset(self):
+        with self._lock:
+            self._instance = None
+
+    def __getattr__(self, item):
+        return getattr(self.get(), item)
+
+    def __call__(self, *args, **kwargs):
+        return self.get()(*args, **kwargs)
+
+
+_providers: Dict[str, LazyProvider] = {}
+
+
+def register(name: str, factory: Callable[[], Any], when: Optional[Callable[[], bool]] = None) -> LazyProvider:
+    """Register a lazily constructed client under a unique name; `when` tells whether the configuration uses it"""
+    provider = LazyProvider(name, factory, when)
+    _providers[name] = provider
+    return provider
+
+
+def get_provider(name: str) -> LazyProvider:
+    return _providers[name]
+
+
+def warm_providers(*names: str):
+    """Build the given clients (or every one the configuration uses) ahead of the first request"""
+    for name in names or [name for name, provider in _providers.items() if provider.in_use]:
+        try:
+            _providers[name].get()
+        except Exception as e:
+            logger.error(f"Failed to warm {name} client: {e}")
@@ -1,38 +1,51 @@
 import os
-import chromadb
 import logging
 from dotenv import load_dotenv
-from openai import AzureOpenAI, OpenAI
 
 from .constants import (
     TOKENIZERS_PARALLELISM, 
     CHROMA_PERSIST_PATH, 
     AZURE_API_VERSION,
-    EMBEDDING_MODEL
+    EMBEDDING_MODEL,
+    VECTOR_BACKEND
 )
+from .providers import register
 
 load_dotenv()
 
 # Disable tokenizers parallelism to avoid warnings
 os.environ["TOKENIZERS_PARALLELISM"] = TOKENIZERS_PARALLELISM
 
+# Heavy clients are built on first use (or warmed at startup) rather than at import time
+def _create_azure_client():
+    from openai import AzureOpenAI
+    return AzureOpenAI(
+        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+        api_version=AZURE_API_VERSION
+    )
+
+def _create_openai_client():
+    from openai import OpenAI
+    return OpenAI(
+        api_key=os.getenv("OPENAI_API_KEY")
+    )
+
+def _create_chroma_client():
+    import chromadb
+    return chromadb.PersistentClient(path=CHROMA_PERSIST_PATH)
+
 # Azure OpenAI client
-client = AzureOpenAI(
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version=AZURE_API_VERSION
-)
+client = register("azure_openai", _create_azure_client)
 
 # Regular OpenAI client for embeddings
-client_openai = OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY")
-)
+client_openai = register("openai", _create_openai_client)
 
 # RapidAPI configuration
 RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY")
 
 # ChromaDB configuration
-chroma_client = chromadb.PersistentClient(path=CHROMA_PERSIST_PATH)
+chroma_client = register("chroma", _create_chroma_client, when=lambda: VECTOR_BACKEND == "chroma")
 
 def get_embeddings(texts):
     """Get embeddings using OpenAI API"""
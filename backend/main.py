@@ -1,21 +1,44 @@
+import asyncio
 import logging
 import time
 import os
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, BackgroundTasks, UploadFile, File, Depends
+from fastapi import FastAPI, BackgroundTasks, UploadFile, File, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
-from config.models import MissionRequest, MessageRequest
+from config.models import MissionRequest, MessageRequest, BatchMessageRequest
+from config.providers import warm_providers
+from config.constants import REFRESH_ENABLED, RUN_MIGRATIONS_ON_STARTUP
+from services.enrichment import refresh_scheduler, cancel_all_enrichment
+from services.search import sharded_scorer
+from migrations import apply_migrations
+from services.metrics import http_request_seconds, render_metrics
 from services.auth import get_current_user as verify_supabase_token
-from api.upload import get_enrichment_progress, upload_csv
-from api.suggestions import get_suggestions
-from api.messages import generate_message
+from api.upload import get_enrichment_progress, upload_csv, cancel_user_enrichment
+from api.suggestions import get_suggestions, get_suggestion_reasoning
+from api.messages import generate_message, generate_messages_batch
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="LinkedIn AI Chatbot with Authentication")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the clients the configured backends use (OpenAI, Supabase, databases, Chroma or pgvector) before serving traffic
+    warm_providers()
+    if RUN_MIGRATIONS_ON_STARTUP:
+        await apply_migrations()
+    refresh_task = asyncio.create_task(refresh_scheduler()) if REFRESH_ENABLED else None
+    yield
+    if refresh_task:
+        refresh_task.cancel()
+    # Flush whatever each running enrichment has finished
+    await cancel_all_enrichment()
+    sharded_scorer.shutdown()
+
+app = FastAPI(title="LinkedIn AI Chatbot with Authentication", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -28,6 +51,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start_time = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Use the route template rather than the raw path to keep label cardinality bounded
+        route = request.scope.get("route")
+        path = route.path if route else "unmatched"
+        http_request_seconds.observe(time.perf_counter() - start_time, method=request.method, path=path, status=status)
+
 @app.get("/")
 async def root():
     return {"message": "LinkedIn AI Chatbot API with Supabase Authentication"}
@@ -36,6 +73,10 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "linkedin-ai-backend"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # Public endpoint - no auth required
 @app.get("/enrichment-progress")
 async def enrichment_progress(user: dict = Depends(verify_supabase_token)):
@@ -50,13 +91,21 @@ async def upload_csv_endpoint(
     logger.info(f"CSV upload processed in {time.time()-start_time:.2f} seconds for user {csv_files.get('user_id')}")
     return csv_files
 
+@app.post("/cancel-enrichment")
+async def cancel_enrichment_endpoint(user: dict = Depends(verify_supabase_token)):
+    return await cancel_user_enrichment(user)
+
 @app.post("/get-suggestions")
-async def get_suggestions_endpoint(request: MissionRequest, user: dict = Depends(verify_supabase_token)):
+async def get_suggestions_endpoint(request: MissionRequest, background_tasks: BackgroundTasks, user: dict = Depends(verify_supabase_token)):
     start_time = time.time()
-    suggestions = await get_suggestions(request, user)
+    suggestions = await get_suggestions(request, background_tasks, user)
     logger.info(f"Processed mission request in {time.time()-start_time:.2f} seconds for user {suggestions.get('user_id')}")
     return suggestions
 
+@app.get("/suggestion-reasoning/{reasoning_id}")
+async def suggestion_reasoning_endpoint(reasoning_id: str, user: dict = Depends(verify_supabase_token)):
+    return await get_suggestion_reasoning(reasoning_id, user)
+
 @app.post("/generate-message") 
 async def generate_message_endpoint(request: MessageRequest, user: dict = Depends(verify_supabase_token)):
     start_time = time.time()
@@ -64,6 +113,11 @@ async def generate_message_endpoint(request: MessageRequest, user: dict = Depend
     logger.info(f"Processed message request in {time.time()-start_time:.2f} seconds for user {response.get('user_id')}")
     return response
 
+@app.post("/generate-messages")
+async def generate_messages_batch_endpoint(request: BatchMessageRequest, user: dict = Depends(verify_supabase_token)):
+    logger.info(f"Streaming {len(request.recipients)} messages for user {user.get('user_id')}")
+    return await generate_messages_batch(request, user)
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", 8000))
@@ -0,0 +1,4 @@
+from .versions import MIGRATIONS, Migration
+from .runner import apply_migrations, pending_migrations
+
+__all__ = ['MIGRATIONS', 'Migration', 'apply_migrations', 'pending_migrations']
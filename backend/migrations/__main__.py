@@ -0,0 +1,41 @@
+"""Database schema migrations.
+
+Run from the backend directory:
+
+    python -m migrations                 # apply pending migrations
+    python -m migrations --status        # list pending migrations without applying them
+    python -m migrations --check-plans   # fail if a hot query falls back to a sequential scan
+"""
+import asyncio
+import argparse
+import logging
+from .runner import apply_migrations, pending_migrations
+from .plan_check import check_query_plans
+
+
+async def main(args) -> int:
+    if args.status:
+        pending = await pending_migrations()
+        print(f"Pending migrations: {pending or 'none'}")
+        return 0
+
+    if not args.check_plans:
+        await apply_migrations()
+        return 0
+
+    failures = 0
+    for name, seq_scans in (await check_query_plans()).items():
+        if seq_scans:
+            failures += 1
+            print(f"FAIL  {name}: sequential scan on {', '.join(seq_scans)}")
+        else:
+            print(f"ok    {name}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply schema migrations or check query plans.")
+    parser.add_argument("--status", action="store_true", help="List pending migrations")
+    parser.add_argument("--check-plans", action="store_true", help="EXPLAIN the hot queries and fail on sequential scans")
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    raise SystemExit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,58 @@
+import json
+import uuid
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from config.database import engine
+from services.storage import (
+    user_connections_query,
+    suggestion_hits_update,
+    stale_connections_query,
+    cached_profiles_query
+)
+
+logger = logging.getLogger(__name__)
+
+
+def checked_queries() -> Dict[str, object]:
+    """The hot queries that must be served by an index, with representative parameters"""
+    user_id = str(uuid.uuid4())
+    urls = [f"https://www.linkedin.com/in/example-{i}" for i in range(3)]
+    now = datetime.utcnow()
+    return {
+        "load_enriched_cache": user_connections_query(user_id),
+        "record_suggestion_hits": suggestion_hits_update(user_id, urls),
+        "load_stale_connections": stale_connections_query(now - timedelta(days=30), 500),
+        "load_cached_profiles": cached_profiles_query(urls, now - timedelta(days=30)),
+    }
+
+
+def _compile(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def _seq_scans(plan: dict) -> List[str]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name", "?"))
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+async def check_query_plans() -> Dict[str, List[str]]:
+    """Tables each hot query still reads with a sequential scan; empty lists mean the query is indexed"""
+    results = {}
+    async with engine.connect() as conn:
+        for name, statement in checked_queries().items():
+            # Small test tables make sequential scans cheapest, so take them off the table:
+            # a Seq Scan that survives means no usable index exists
+            await conn.execute(text("SET LOCAL enable_seqscan = off"))
+            result = await conn.execute(text(f"EXPLAIN (FORMAT JSON) {_compile(statement)}"))
+            plan = result.scalar()
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            results[name] = _seq_scans(plan[0]["Plan"])
+            await conn.rollback()
+    return results
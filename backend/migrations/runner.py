@@ -0,0 +1,56 @@
+import logging
+from typing import List
+from sqlalchemy import text
+from config.database import engine
+from .versions import MIGRATIONS, Migration
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key for pg_advisory_xact_lock, so replicas starting together migrate one at a time
+MIGRATION_LOCK_KEY = 7243019
+
+CREATE_VERSIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    description VARCHAR NOT NULL,
+    applied_at TIMESTAMP NOT NULL DEFAULT now()
+)
+"""
+
+
+async def applied_versions(conn) -> set:
+    result = await conn.execute(text("SELECT version FROM schema_migrations"))
+    return {row.version for row in result}
+
+
+async def apply_migrations(migrations: List[Migration] = MIGRATIONS) -> List[int]:
+    """Apply pending migrations in version order; returns the versions applied"""
+    applied = []
+    async with engine.begin() as conn:
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        await conn.execute(text(CREATE_VERSIONS_TABLE))
+        done = await applied_versions(conn)
+
+        for migration in sorted(migrations, key=lambda m: m.version):
+            if migration.version in done or not migration.applies():
+                continue
+            logger.info(f"Applying migration {migration.version}: {migration.description}")
+            # Postgres DDL is transactional: a failure rolls back the whole run
+            for statement in migration.statements:
+                await conn.execute(text(statement))
+            await conn.execute(
+                text("INSERT INTO schema_migrations (version, description) VALUES (:version, :description)"),
+                {"version": migration.version, "description": migration.description}
+            )
+            applied.append(migration.version)
+
+    if applied:
+        logger.info(f"Applied migrations {applied}")
+    return applied
+
+
+async def pending_migrations(migrations: List[Migration] = MIGRATIONS) -> List[int]:
+    async with engine.begin() as conn:
+        await conn.execute(text(CREATE_VERSIONS_TABLE))
+        done = await applied_versions(conn)
+    return [m.version for m in sorted(migrations, key=lambda m: m.version) if m.version not in done and m.applies()]
@@ -0,0 +1,110 @@
+from typing import Callable, List, Optional
+from config.constants import (
+    VECTOR_BACKEND,
+    EMBEDDING_DIMENSIONS,
+    PGVECTOR_HNSW_M,
+    PGVECTOR_HNSW_EF_CONSTRUCTION
+)
+
+
+class Migration:
+    """An ordered, append-only schema change; statements run in one transaction"""
+    def __init__(self, version: int, description: str, statements: List[str], when: Optional[Callable[[], bool]] = None):
+        self.version = version
+        self.description = description
+        self.statements = statements
+        # Migrations whose condition is false are skipped and not recorded, so they run once it holds
+        self.when = when
+
+    def applies(self) -> bool:
+        return self.when is None or self.when()
+
+
+def _hnsw_index(attr: str) -> str:
+    return (
+        f"CREATE INDEX IF NOT EXISTS ix_connection_embeddings_{attr}_embedding_hnsw "
+        f"ON connection_embeddings USING hnsw ({attr}_embedding vector_cosine_ops) "
+        f"WITH (m = {PGVECTOR_HNSW_M}, ef_construction = {PGVECTOR_HNSW_EF_CONSTRUCTION})"
+    )
+
+
+# Never edit a released migration; add a new one instead
+MIGRATIONS = [
+    Migration(1, "base tables", [
+        """
+        CREATE TABLE IF NOT EXISTS user_connections (
+            id UUID PRIMARY KEY,
+            user_id UUID NOT NULL,
+            url VARCHAR NOT NULL,
+            first_name VARCHAR NOT NULL,
+            last_name VARCHAR NOT NULL,
+            company VARCHAR,
+            position VARCHAR,
+            email VARCHAR,
+            connected_on VARCHAR,
+            enriched BOOLEAN NOT NULL DEFAULT FALSE,
+            profile_data JSONB,
+            created_at TIMESTAMP NOT NULL,
+            updated_at TIMESTAMP NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS profile_cache (
+            url VARCHAR PRIMARY KEY,
+            profile_data JSONB,
+            fetched_at TIMESTAMP NOT NULL
+        )
+        """,
+    ]),
+    Migration(2, "per-user indexes on user_connections", [
+        # url used to be unique across all users, which rejected shared connections
+        "ALTER TABLE user_connections DROP CONSTRAINT IF EXISTS user_connections_url_key",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_user_connections_user_id_url ON user_connections (user_id, url)",
+        "CREATE INDEX IF NOT EXISTS ix_user_connections_stale ON user_connections (updated_at) WHERE enriched",
+    ]),
+    Migration(3, "pgvector connection embeddings", [
+        "CREATE EXTENSION IF NOT EXISTS vector",
+        f"""
+        CREATE TABLE IF NOT EXISTS connection_embeddings (
+            user_id UUID NOT NULL,
+            url VARCHAR NOT NULL,
+            summary_embedding VECTOR({EMBEDDING_DIMENSIONS}),
+            position_embedding VECTOR({EMBEDDING_DIMENSIONS}),
+            location_embedding VECTOR({EMBEDDING_DIMENSIONS}),
+            industry_embedding VECTOR({EMBEDDING_DIMENSIONS}),
+            text_hashes JSONB,
+            updated_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (user_id, url)
+        )
+        """,
+        *[_hnsw_index(attr) for attr in ("summary", "position", "location", "industry")],
+    ], when=lambda: VECTOR_BACKEND == "pgvector"),
+    Migration(4, "shared profile refresh budget", [
+        """
+        CREATE TABLE IF NOT EXISTS refresh_budget (
+            day DATE PRIMARY KEY,
+            used INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+    ]),
+    Migration(5, "shared suggestion reasoning jobs", [
+        """
+        CREATE TABLE IF NOT EXISTS reasoning_jobs (
+            id VARCHAR PRIMARY KEY,
+            user_id UUID NOT NULL,
+            status VARCHAR NOT NULL,
+            suggestions JSONB,
+            created_at TIMESTAMP NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_reasoning_jobs_created_at ON reasoning_jobs (created_at)",
+    ]),
+    Migration(6, "pgvector shared text embeddings", [
+        f"""
+        CREATE TABLE IF NOT EXISTS shared_embeddings (
+            text_hash VARCHAR PRIMARY KEY,
+            embedding VECTOR({EMBEDDING_DIMENSIONS}) NOT NULL
+        )
+        """,
+    ], when=lambda: VECTOR_BACKEND == "pgvector"),
+]
@@ -1,3 +1,4 @@
-from .database import UserConnection
+from .database import UserConnection, ProfileCache, ConnectionEmbedding, SharedEmbedding, RefreshBudget, ReasoningJob
+from .connection import Connection
 
-__all__ = ['UserConnection']
\ No newline at end of file
+__all__ = ['UserConnection', 'ProfileCache', 'ConnectionEmbedding', 'SharedEmbedding', 'RefreshBudget', 'ReasoningJob', 'Connection']
@@ -0,0 +1,149 @@
+from collections.abc import MutableMapping
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+# Columns of user_connections, always present
+BASE_FIELDS = (
+    "first_name", "last_name", "url", "company", "position", "email", "connected_on", "enriched"
+)
+
+# profile_data keys common enough to get a slot; present only once set
+PROFILE_FIELDS = (
+    "summary", "headline", "current_company", "current_title", "location",
+    "education", "industry", "company_size", "suggestion_count"
+)
+
+# Other user_connections columns; never part of profile_data
+ROW_METADATA_FIELDS = ("id", "user_id", "created_at", "updated_at")
+
+_BASE = frozenset(BASE_FIELDS)
+_PROFILE = frozenset(PROFILE_FIELDS)
+
+# Marks a profile slot that was never set (None is a legitimate stored value)
+_UNSET = object()
+
+
+class Connection(MutableMapping):
+    """Compact connection record with a dict interface
+
+    Attributes live in __slots__ instead of a per-instance dict, so a user's connections
+    take a fraction of the memory of plain dicts and can be shared between requests.
+    Rarely used profile_data keys go in `extra`. Profile fields are only present once set,
+    like keys of the dicts this replaces; read them through the mapping interface.
+    `updated_at` is row metadata (set when loaded from the database), not a mapping key.
+    """
+    __slots__ = BASE_FIELDS + PROFILE_FIELDS + ("extra", "updated_at")
+
+    def __init__(self, first_name: str = "", last_name: str = "", url: str = "", company: Optional[str] = None,
+                 position: Optional[str] = None, email: Optional[str] = None, connected_on: Optional[str] = None,
+                 enriched: bool = False, **profile: Any):
+        self.first_name = first_name
+        self.last_name = last_name
+        self.url = url
+        self.company = company
+        self.position = position
+        self.email = email
+        self.connected_on = connected_on
+        self.enriched = enriched
+        for field in PROFILE_FIELDS:
+            setattr(self, field, _UNSET)
+        self.extra = None
+        # Dicts shaped like a whole row carry these; keeping them in `extra` would persist them into profile_data
+        self.updated_at = profile.pop("updated_at", None)
+        for field in ROW_METADATA_FIELDS:
+            profile.pop(field, None)
+        for key, value in profile.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data) -> "Connection":
+        if isinstance(data, Connection):
+            return data
+        return cls(**data)
+
+    @classmethod
+    def from_row(cls, first_name, last_name, url, company, position, email, connected_on, enriched,
+                 profile_data: Optional[Dict[str, Any]], updated_at: Optional[datetime] = None) -> "Connection":
+        """Build from a user_connections row without an intermediate merged dict"""
+        conn = cls(first_name, last_name, url, company, position, email, connected_on, enriched, **(profile_data or {}))
+        # The column wins over any copy an older version saved inside profile_data
+        conn.updated_at = updated_at
+        return conn
+
+    def replace(self, **changes: Any) -> "Connection":
+        """Copy with some fields changed"""
+        copy = Connection.__new__(Connection)
+        for field in self.__slots__:
+            setattr(copy, field, getattr(self, field))
+        if self.extra is not None:
+            copy.extra = dict(self.extra)
+        for key, value in changes.items():
+            copy[key] = value
+        return copy
+
+    def profile_data(self) -> Dict[str, Any]:
+        """Everything stored in the profile_data JSONB column"""
+        data = {field: getattr(self, field) for field in PROFILE_FIELDS if getattr(self, field) is not _UNSET}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _BASE:
+            return getattr(self, key)
+        if key in _PROFILE:
+            value = getattr(self, key)
+            if value is _UNSET:
+                raise KeyError(key)
+            return value
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key in _BASE or key in _PROFILE:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key: str):
+        if key in _PROFILE and getattr(self, key) is not _UNSET:
+            setattr(self, key, _UNSET)
+        elif self.extra is not None and key in self.extra:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from BASE_FIELDS
+        for field in PROFILE_FIELDS:
+            if getattr(self, field) is not _UNSET:
+                yield field
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key) -> bool:
+        if key in _BASE:
+            return True
+        if key in _PROFILE:
+            return getattr(self, key) is not _UNSET
+        return self.extra is not None and key in self.extra
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # Hot path: avoid the KeyError round trip of the Mapping default
+        if key in _BASE:
+            return getattr(self, key)
+        if key in _PROFILE:
+            value = getattr(self, key)
+            return default if value is _UNSET else value
+        if self.extra is not None:
+            return self.extra.get(key, default)
+        return default
+
+    def __repr__(self) -> str:
+        return f"Connection({self.url!r}, enriched={self.enriched})"
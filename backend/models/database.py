@@ -1,16 +1,26 @@
 from sqlmodel import SQLModel, Field
-from sqlalchemy import Column
+from sqlalchemy import Column, JSON, Index, text
 from sqlalchemy.dialects.postgresql import JSONB  # Add this import
-from typing import Optional, Dict, Any
-from datetime import datetime
+from pgvector.sqlalchemy import Vector
+from typing import Optional, Dict, Any, List
+from datetime import datetime, date
 import uuid
+from config.constants import EMBEDDING_DIMENSIONS, PGVECTOR_HNSW_M, PGVECTOR_HNSW_EF_CONSTRUCTION
 
 class UserConnection(SQLModel, table=True):
     __tablename__ = "user_connections"
+    # Mirrors the indexes created by migrations/versions.py
+    __table_args__ = (
+        # Upsert target; its user_id prefix also serves per-user loads
+        Index("ux_user_connections_user_id_url", "user_id", "url", unique=True),
+        # Stale profile refresh only looks at enriched rows
+        Index("ix_user_connections_stale", "updated_at", postgresql_where=text("enriched")),
+    )
     
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     user_id: uuid.UUID
-    url: str = Field(unique=True)
+    # The same person can be a connection of many users, so url is only unique per user
+    url: str
     first_name: str
     last_name: str
     company: Optional[str] = None
@@ -22,8 +32,79 @@ class UserConnection(SQLModel, table=True):
     # Fix: Use Column with JSONB type instead of Field
     profile_data: Dict[str, Any] = Field(
         default_factory=dict,
-        sa_column=Column(JSONB)  # Specify PostgreSQL JSONB type
+        sa_column=Column(JSONB().with_variant(JSON(), "sqlite"))  # PostgreSQL JSONB, plain JSON on SQLite (benchmarks)
     )
     
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class ProfileCache(SQLModel, table=True):
+    """Enriched profile fields shared across users, keyed by LinkedIn URL"""
+    __tablename__ = "profile_cache"
+    
+    url: str = Field(primary_key=True)
+    profile_data: Dict[str, Any] = Field(
+        default_factory=dict,
+        sa_column=Column(JSONB().with_variant(JSON(), "sqlite"))
+    )
+    fetched_at: datetime = Field(default_factory=datetime.utcnow)
+
+class RefreshBudget(SQLModel, table=True):
+    """RapidAPI calls spent on profile refreshes per day, shared by every worker"""
+    __tablename__ = "refresh_budget"
+    
+    day: date = Field(primary_key=True)
+    used: int = Field(default=0)
+
+class ReasoningJob(SQLModel, table=True):
+    """Deferred reasoning for locally ranked suggestions, readable from any worker"""
+    __tablename__ = "reasoning_jobs"
+    __table_args__ = (
+        # Expired jobs are pruned by age
+        Index("ix_reasoning_jobs_created_at", "created_at"),
+    )
+    
+    id: str = Field(primary_key=True)
+    user_id: uuid.UUID
+    status: str = "pending"
+    suggestions: List[Dict[str, Any]] = Field(
+        default_factory=list,
+        sa_column=Column(JSONB().with_variant(JSON(), "sqlite"))
+    )
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+def _hnsw_index(column: str) -> Index:
+    return Index(
+        f"ix_connection_embeddings_{column}_hnsw", column,
+        postgresql_using="hnsw",
+        postgresql_with={"m": PGVECTOR_HNSW_M, "ef_construction": PGVECTOR_HNSW_EF_CONSTRUCTION},
+        postgresql_ops={column: "vector_cosine_ops"}
+    )
+
+class ConnectionEmbedding(SQLModel, table=True):
+    """Attribute embeddings of a connection, stored next to it in Postgres (VECTOR_BACKEND = "pgvector")"""
+    __tablename__ = "connection_embeddings"
+    __table_args__ = tuple(
+        _hnsw_index(f"{attr}_embedding") for attr in ("summary", "position", "location", "industry")
+    )
+    
+    # Same key as user_connections, so search joins the two tables on (user_id, url)
+    user_id: uuid.UUID = Field(primary_key=True)
+    url: str = Field(primary_key=True)
+    summary_embedding: Optional[List[float]] = Field(default=None, sa_column=Column(Vector(EMBEDDING_DIMENSIONS)))
+    position_embedding: Optional[List[float]] = Field(default=None, sa_column=Column(Vector(EMBEDDING_DIMENSIONS)))
+    location_embedding: Optional[List[float]] = Field(default=None, sa_column=Column(Vector(EMBEDDING_DIMENSIONS)))
+    industry_embedding: Optional[List[float]] = Field(default=None, sa_column=Column(Vector(EMBEDDING_DIMENSIONS)))
+    # Hash of the text behind each embedding, to re-embed only what changed
+    text_hashes: Dict[str, str] = Field(
+        default_factory=dict,
+        sa_column=Column(JSONB().with_variant(JSON(), "sqlite"))
+    )
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class SharedEmbedding(SQLModel, table=True):
+    """Embeddings keyed by the hash of their text, reused by every user (VECTOR_BACKEND = "pgvector")"""
+    __tablename__ = "shared_embeddings"
+    
+    text_hash: str = Field(primary_key=True)
+    embedding: List[float] = Field(sa_column=Column(Vector(EMBEDDING_DIMENSIONS), nullable=False))
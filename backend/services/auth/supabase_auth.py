@@ -1,7 +1,7 @@
 import os
 from fastapi import HTTPException
-from supabase import create_client, Client
 from dotenv import load_dotenv
+from config.providers import register
 
 load_dotenv()
 
@@ -9,7 +9,11 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+def _create_supabase_client():
+    from supabase import create_client
+    return create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+
+supabase = register("supabase", _create_supabase_client)
 
 def verify_supabase_token(token: str):
     """Verify Supabase JWT token using JWKS and return user info"""
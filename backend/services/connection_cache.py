@@ -0,0 +1,48 @@
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from config.constants import CONNECTION_CACHE_ENABLED, CONNECTION_CACHE_MAX_USERS
+from models.connection import Connection
+
+logger = logging.getLogger(__name__)
+
+# (row count, newest updated_at) of a user's connections when they were loaded
+Version = Tuple[int, Optional[datetime]]
+
+
+class ConnectionCache:
+    """Process-local LRU of users' connection working sets
+
+    Entries are dropped on every write through services.storage, and checked against the
+    row count and newest updated_at before use so writes from other processes are seen.
+    Cached connections are shared between requests and must not be mutated.
+    """
+    def __init__(self, max_users: int, enabled: bool = True):
+        self.max_users = max_users
+        self.enabled = enabled
+        self._users: "OrderedDict[str, Tuple[Version, Dict[str, Connection]]]" = OrderedDict()
+
+    def get(self, user_id: str, version: Version) -> Optional[Dict[str, Connection]]:
+        entry = self._users.get(user_id)
+        if entry is None:
+            return None
+        if entry[0] != version:
+            del self._users[user_id]
+            return None
+        self._users.move_to_end(user_id)
+        return entry[1]
+
+    def store(self, user_id: str, version: Version, connections: Dict[str, Connection]):
+        if not self.enabled:
+            return
+        self._users[user_id] = (version, connections)
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        self._users.pop(user_id, None)
+
+
+connection_cache = ConnectionCache(max_users=CONNECTION_CACHE_MAX_USERS, enabled=CONNECTION_CACHE_ENABLED)
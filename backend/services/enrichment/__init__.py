@@ -1,5 +1,13 @@
-from .background_tasks import background_enrichment, vectorization_catchup
+from .background_tasks import background_enrichment, vectorization_catchup, warm_user_caches
 from .profile_fetcher import enrich_profile
-from .data_formatter import format_enriched_connection
+from .data_formatter import format_enriched_connection, extract_shared_profile, apply_cached_profile
+from .refresh import refresh_scheduler, refresh_stale_connections
+from .scheduler import enrichment_scheduler
+from .pipeline import cancel_enrichment, cancel_all_enrichment
 
-__all__ = ['background_enrichment', 'vectorization_catchup', 'enrich_profile', 'format_enriched_connection']
\ No newline at end of file
+__all__ = [
+    'background_enrichment', 'vectorization_catchup', 'warm_user_caches', 'enrich_profile', 'format_enriched_connection',
+    'extract_shared_profile', 'apply_cached_profile',
+    'refresh_scheduler', 'refresh_stale_connections', 'enrichment_scheduler',
+    'cancel_enrichment', 'cancel_all_enrichment'
+]
\ No newline at end of file
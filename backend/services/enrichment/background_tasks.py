@@ -1,79 +1,75 @@
 import asyncio
 import logging
-from config.constants import MAX_CONCURRENT_REQUESTS, RATE_LIMIT_SLEEP_SECONDS
-from config.settings import update_user_progress
-from services.storage import load_enriched_cache, save_enriched_cache
-from services.search import ConnectionSemanticSearch
-from .profile_fetcher import enrich_profile
-from .data_formatter import format_enriched_connection
+from collections import Counter
+from config.constants import POST_UPLOAD_WARMUP_ENABLED, WARMUP_VALUES_PER_ATTRIBUTE
+from services.storage import load_enriched_cache
+from services.search import ConnectionSemanticSearch, mission_cache, query_embedding_cache
+from services.metrics import span
+from .pipeline import run_enrichment
 
 logger = logging.getLogger(__name__)
 
+# Mission attribute -> connection fields holding comparable values
+WARMUP_ATTRIBUTE_FIELDS = {
+    "position": ("current_title", "position"),
+    "location": ("location",),
+    "industry": ("industry",)
+}
+
+def _query_text(value):
+    """A searchable attribute value, or None for blanks (pandas reads empty CSV cells as NaN / "nan")"""
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    if not value or value.lower() in ("nan", "n/a", "none"):
+        return None
+    return value
+
+def frequent_query_texts(connections, recent_attributes) -> list:
+    """Attribute values the user's next missions are likely to search for"""
+    texts = [_query_text(value) for attributes in recent_attributes for value in attributes.values()]
+    texts = [text for text in texts if text]
+    for attr, fields in WARMUP_ATTRIBUTE_FIELDS.items():
+        counts = Counter()
+        for conn in connections.values():
+            value = next((text for text in (_query_text(conn.get(field)) for field in fields) if text), None)
+            if value:
+                counts[value] += 1
+        texts.extend(value for value, _ in counts.most_common(WARMUP_VALUES_PER_ATTRIBUTE))
+    return texts
+
 async def vectorization_catchup(connections_to_vectorize, user_id: str):  
     """Background task for vectorizing enriched connections"""    
     semantic_search = ConnectionSemanticSearch(user_id) 
     
     try:
         logger.info(f"Starting vectorization catch-up for {len(connections_to_vectorize)} connections")
-        semantic_search.batch_store_embeddings(connections_to_vectorize)
+        # Chroma and snapshot writes block, so keep them off the event loop
+        await asyncio.to_thread(semantic_search.batch_store_embeddings, connections_to_vectorize)
+        await asyncio.to_thread(semantic_search.write_snapshot)
         logger.info("Vectorization catch-up completed successfully")
     except Exception as e:
         logger.error(f"Error in vectorization catch-up: {str(e)}")
 
 async def background_enrichment(connections_to_enrich, user_id: str):
-    """Simplified background enrichment with accurate progress tracking"""
-    
-    enriched_cache = await load_enriched_cache(user_id)
-    total = len(connections_to_enrich)
-    completed_count = 0
-    
-    # Initialize progress
-    update_user_progress(user_id, 0, total, False)
-    
-    # Initialize semantic search
-    semantic_search = ConnectionSemanticSearch(user_id)
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
-    
-    async def enrich_single_connection(connection, index):
-        nonlocal completed_count
-        async with semaphore:
-            try:
-                # Enrichment
-                enriched_data = await enrich_profile(connection["url"])
-                enriched_connection = format_enriched_connection(connection, enriched_data)
-                
-                # Vectorization if enriched
-                if enriched_connection.get("enriched", False):
-                    semantic_search.store_connection_embeddings(enriched_connection)
-                
-                # Update cache
-                enriched_cache[connection["url"]] = enriched_connection
-                
-                # Increment counter and update progress
-                completed_count += 1
-                update_user_progress(user_id, completed_count, total, False)
-                
-                await asyncio.sleep(RATE_LIMIT_SLEEP_SECONDS)
-                
-            except Exception as e:
-                logger.error(f"Failed to process connection {index+1}: {str(e)}")
-                # Still increment on failure
-                completed_count += 1
-                update_user_progress(user_id, completed_count, total, False)
-    
+    """Background enrichment through the per-user fetch/embed/persist pipeline"""
+    await run_enrichment(connections_to_enrich, user_id)
+
+async def warm_user_caches(user_id: str):
+    """Get a user's next search onto the warm path: collections, connections and query embeddings"""
+    if not POST_UPLOAD_WARMUP_ENABLED:
+        return
     try:
-        # Process all connections
-        tasks = [
-            enrich_single_connection(conn, i) 
-            for i, conn in enumerate(connections_to_enrich)
-        ]
-        
-        await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Save and mark complete
-        await save_enriched_cache(user_id, enriched_cache)
-        update_user_progress(user_id, total, total, True)
-        
+        with span("warmup", "open_collections"):
+            semantic_search = await asyncio.to_thread(ConnectionSemanticSearch, user_id)
+            await asyncio.to_thread(semantic_search.open_collections)
+        with span("warmup", "load_connections"):
+            connections = await load_enriched_cache(user_id, read_only=True)
+        with span("warmup", "preload_snapshot"):
+            await asyncio.to_thread(semantic_search.preload)
+        with span("warmup", "query_embeddings"):
+            texts = frequent_query_texts(connections, mission_cache.recent_attributes(user_id))
+            embedded = await asyncio.to_thread(query_embedding_cache.warm, texts)
+        logger.info(f"User {user_id}: warmed caches for {len(connections)} connections, {embedded} new query embeddings")
     except Exception as e:
-        logger.error(f"Error in enrichment: {str(e)}")
-        update_user_progress(user_id, total, total, True)
\ No newline at end of file
+        logger.error(f"Error warming caches for user {user_id}: {str(e)}")
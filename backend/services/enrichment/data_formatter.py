@@ -1,3 +1,11 @@
+from models.connection import Connection
+
+# Fields produced by enrichment that describe the person rather than one user's connection
+SHARED_PROFILE_FIELDS = [
+    "summary", "headline", "current_company", "current_title",
+    "location", "education", "industry", "company_size"
+]
+
 def format_enriched_connection(connection, enriched_data):
     """Format connection with enriched data"""
     if not enriched_data:
@@ -23,15 +31,22 @@ def format_enriched_connection(connection, enriched_data):
         if school:
             education_summary.append(school)
     
-    return {
-        **connection,
-        "enriched": True,
-        "summary": summary,
-        "headline": headline,
-        "current_company": current_position.get("companyName", connection.get("company", "")),
-        "current_title": current_position.get("title", connection.get("position", "")),
-        "location": location,
-        "education": ", ".join(education_summary),
-        "industry": current_position.get("companyIndustry", ""),
-        "company_size": current_position.get("companyStaffCountRange", "")
-    }
\ No newline at end of file
+    return Connection.from_dict(connection).replace(
+        enriched=True,
+        summary=summary,
+        headline=headline,
+        current_company=current_position.get("companyName", connection.get("company", "")),
+        current_title=current_position.get("title", connection.get("position", "")),
+        location=location,
+        education=", ".join(education_summary),
+        industry=current_position.get("companyIndustry", ""),
+        company_size=current_position.get("companyStaffCountRange", "")
+    )
+
+def extract_shared_profile(enriched_connection):
+    """Subset of an enriched connection that can be shared with other users"""
+    return {field: enriched_connection.get(field, "") for field in SHARED_PROFILE_FIELDS}
+
+def apply_cached_profile(connection, cached_profile):
+    """Enrich a connection from the shared profile cache instead of the API"""
+    return Connection.from_dict(connection).replace(enriched=True, **cached_profile)
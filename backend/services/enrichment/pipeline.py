@@ -0,0 +1,257 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from config.constants import (
+    MAX_CONCURRENT_REQUESTS,
+    RATE_LIMIT_SLEEP_SECONDS,
+    PROFILE_CACHE_TTL_DAYS,
+    ENRICHMENT_STAGE_QUEUE_SIZE,
+    ENRICHMENT_PERSIST_BATCH_SIZE,
+    VECTORIZE_BATCH_SIZE,
+    VECTORIZE_FLUSH_SECONDS,
+    ENRICHMENT_SHUTDOWN_TIMEOUT_SECONDS
+)
+from config.settings import update_user_progress
+from services.storage import save_enriched_cache, load_cached_profiles, save_cached_profiles
+from services.search import ConnectionSemanticSearch
+from services.metrics import enrichment_queue_depth, enrichment_profiles, span
+from .profile_fetcher import enrich_profile
+from .data_formatter import format_enriched_connection, extract_shared_profile, apply_cached_profile
+from .scheduler import enrichment_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class EnrichmentJob:
+    """One user's enrichment run: fetch -> embed -> persist stages joined by bounded queues"""
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.total = 0
+        self.completed = 0
+        # Every URL this job has accepted, so repeated uploads don't queue it twice
+        self.accepted = set()
+        self.accepting = True
+        self.finished = asyncio.Event()
+        self.cached_profiles: Dict[str, dict] = {}
+        self.new_shared_profiles: Dict[str, dict] = {}
+        # Fetched by a fetcher that was cancelled while waiting for room in embed_queue
+        self.unqueued = []
+        self.semantic_search = ConnectionSemanticSearch(user_id)
+        # Bounded queues give backpressure: fetchers wait while embedding or persisting lags
+        self.embed_queue = asyncio.Queue(maxsize=ENRICHMENT_STAGE_QUEUE_SIZE)
+        self.persist_queue = asyncio.Queue(maxsize=ENRICHMENT_STAGE_QUEUE_SIZE)
+        self.cancelled = False
+        self.fetchers: List[asyncio.Task] = []
+        self.tasks: List[asyncio.Task] = []
+
+    def add(self, connections: List[dict], cached_profiles: Dict[str, dict]) -> int:
+        """Queue connections not already part of this job; returns how many were added"""
+        fresh = [conn for conn in connections if conn["url"] not in self.accepted]
+        if not fresh:
+            return 0
+        self.accepted.update(conn["url"] for conn in fresh)
+        self.cached_profiles.update({conn["url"]: cached_profiles[conn["url"]] for conn in fresh if conn["url"] in cached_profiles})
+        # Most promising connections first; /get-suggestions can re-prioritize while this runs
+        enrichment_scheduler.enqueue(self.user_id, fresh)
+        self.total += len(fresh)
+        enrichment_queue_depth.inc(len(fresh))
+        update_user_progress(self.user_id, self.completed, self.total, False)
+        return len(fresh)
+
+    async def _fetch_worker(self):
+        while True:
+            connection = enrichment_scheduler.next(self.user_id)
+            if connection is None:
+                # Close the job in the same step the queue runs dry, so run_enrichment
+                # can't add connections that no fetcher is left to pick up
+                self.accepting = False
+                return
+            cached_profile = self.cached_profiles.pop(connection["url"], None)
+            try:
+                if cached_profile:
+                    enriched_connection = apply_cached_profile(connection, cached_profile)
+                else:
+                    try:
+                        enriched_data = await enrich_profile(connection["url"])
+                    except asyncio.CancelledError:
+                        # Never fetched, so a later upload may queue it again
+                        self.accepted.discard(connection["url"])
+                        raise
+                    enriched_connection = format_enriched_connection(connection, enriched_data)
+                    if enriched_data:
+                        self.new_shared_profiles[connection["url"]] = extract_shared_profile(enriched_connection)
+                status = ("cached" if cached_profile else "enriched") if enriched_connection.get("enriched", False) else "not_found"
+            except Exception as e:
+                logger.error(f"Failed to fetch connection {connection['url']}: {str(e)}")
+                enriched_connection, status = connection, "failed"
+
+            try:
+                await self.embed_queue.put((enriched_connection, status))
+            except asyncio.CancelledError:
+                # The profile is already paid for; run() still drains it through embed and persist
+                self.unqueued.append((enriched_connection, status))
+                raise
+
+            # Only API calls count against the rate limit
+            if not cached_profile:
+                await asyncio.sleep(RATE_LIMIT_SLEEP_SECONDS)
+
+    async def _embed_worker(self):
+        """Buffer fetched profiles and vectorize them in batches, flushing by size or age"""
+        loop = asyncio.get_running_loop()
+        buffer = []
+        deadline = None
+        done = False
+        while not done:
+            timeout = max(0.0, deadline - loop.time()) if buffer else None
+            try:
+                item = await asyncio.wait_for(self.embed_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                item = None
+            
+            if item is _DONE:
+                done = True
+            elif item is not None:
+                if not buffer:
+                    deadline = loop.time() + VECTORIZE_FLUSH_SECONDS
+                buffer.append(item)
+            
+            if buffer and (done or item is None or len(buffer) >= VECTORIZE_BATCH_SIZE):
+                await self._vectorize(buffer)
+                buffer = []
+        await self.persist_queue.put(_DONE)
+
+    async def _vectorize(self, items):
+        connections = [conn for conn, status in items if status in ("enriched", "cached")]
+        if connections:
+            try:
+                with span("enrichment", "vectorize"):
+                    # Embedding and Chroma calls block, so keep them off the event loop
+                    await asyncio.to_thread(self.semantic_search.store_connections_embeddings, connections)
+            except Exception as e:
+                logger.error(f"Failed to vectorize {len(connections)} connections: {str(e)}")
+        for item in items:
+            await self.persist_queue.put(item)
+
+    async def _persist_worker(self):
+        batch = {}
+        while (item := await self.persist_queue.get()) is not _DONE:
+            enriched_connection, status = item
+            batch[enriched_connection["url"]] = enriched_connection
+            enrichment_profiles.inc(status=status)
+            if len(batch) >= ENRICHMENT_PERSIST_BATCH_SIZE:
+                await self._flush(batch)
+                batch = {}
+        if batch:
+            await self._flush(batch)
+
+    async def _flush(self, batch: Dict[str, dict]):
+        try:
+            with span("enrichment", "persist"):
+                await save_enriched_cache(self.user_id, batch)
+                shared = {url: self.new_shared_profiles.pop(url) for url in batch if url in self.new_shared_profiles}
+                await save_cached_profiles(shared)
+        except Exception as e:
+            # Unsaved connections stay unenriched and are picked up by the next upload
+            logger.error(f"Failed to persist {len(batch)} enriched connections: {str(e)}")
+        self.completed += len(batch)
+        enrichment_queue_depth.dec(len(batch))
+        update_user_progress(self.user_id, self.completed, self.total, False)
+
+    async def run(self):
+        self.fetchers = [asyncio.create_task(self._fetch_worker()) for _ in range(MAX_CONCURRENT_REQUESTS)]
+        embedder = asyncio.create_task(self._embed_worker())
+        persister = asyncio.create_task(self._persist_worker())
+        self.tasks = [*self.fetchers, embedder, persister]
+        try:
+            # Cancelled fetchers just stop early; whatever they fetched still drains through
+            await asyncio.gather(*self.fetchers, return_exceptions=True)
+            self.accepting = False
+            while self.unqueued:
+                await self.embed_queue.put(self.unqueued.pop())
+            await self.embed_queue.put(_DONE)
+            await asyncio.gather(embedder, persister)
+            # Reads every vector back and writes .npy files, so keep it off the event loop
+            await asyncio.to_thread(self.semantic_search.write_snapshot)
+            if self.cancelled:
+                logger.info(f"User {self.user_id}: enrichment cancelled after {self.completed} of {self.total} connections")
+            else:
+                logger.info(f"User {self.user_id}: enrichment finished for {self.completed} connections")
+        except asyncio.CancelledError:
+            logger.info(f"User {self.user_id}: enrichment interrupted after {self.completed} of {self.total} connections")
+        except Exception as e:
+            logger.error(f"Error in enrichment: {str(e)}")
+        finally:
+            self.accepting = False
+            for task in self.tasks:
+                task.cancel()
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+            enrichment_scheduler.discard(self.user_id)
+            enrichment_queue_depth.dec(self.total - self.completed)
+            update_user_progress(self.user_id, self.completed, self.total, True)
+            self.finished.set()
+
+    def cancel(self):
+        """Stop fetching; connections already fetched are still embedded and saved"""
+        self.cancelled = True
+        self.accepting = False
+        enrichment_scheduler.discard(self.user_id)
+        for task in self.fetchers:
+            task.cancel()
+
+
+# Running jobs, at most one per user
+_jobs: Dict[str, EnrichmentJob] = {}
+
+async def run_enrichment(connections: List[dict], user_id: str):
+    """Enrich connections for a user, joining the user's running job when there is one; returns once they are processed"""
+    # Profiles other users already paid for don't need another API call
+    cached_profiles = await load_cached_profiles([conn["url"] for conn in connections], PROFILE_CACHE_TTL_DAYS)
+    logger.info(f"User {user_id}: {len(cached_profiles)} of {len(connections)} profiles found in the shared cache")
+    
+    job = _jobs.get(user_id)
+    if job is not None and job.accepting:
+        added = job.add(connections, cached_profiles)
+        logger.info(f"User {user_id}: added {added} connections to the running enrichment")
+        # Callers chain work on enrichment being done (e.g. the post-upload warm-up), so wait for the job
+        await job.finished.wait()
+        return
+    if job is not None:
+        # The running job is draining its last stages; start fresh once it is done
+        await job.finished.wait()
+
+    job = EnrichmentJob(user_id)
+    _jobs[user_id] = job
+    try:
+        job.add(connections, cached_profiles)
+        await job.run()
+    finally:
+        if _jobs.get(user_id) is job:
+            del _jobs[user_id]
+
+def cancel_enrichment(user_id: str) -> bool:
+    """Stop a user's running enrichment; already processed connections are kept"""
+    job = _jobs.get(user_id)
+    if job is None:
+        return False
+    job.cancel()
+    return True
+
+async def cancel_all_enrichment(timeout: float = ENRICHMENT_SHUTDOWN_TIMEOUT_SECONDS):
+    """Stop every running job and wait (bounded) for their fetched profiles to be saved"""
+    jobs = list(_jobs.values())
+    for job in jobs:
+        job.cancel()
+    if not jobs:
+        return
+    try:
+        await asyncio.wait_for(asyncio.gather(*(job.finished.wait() for job in jobs)), timeout)
+    except asyncio.TimeoutError:
+        unfinished = sum(1 for job in jobs if not job.finished.is_set())
+        logger.warning(f"{unfinished} enrichment jobs still draining after {timeout}s, shutting down anyway")
+
+def get_enrichment_job(user_id: str) -> Optional[EnrichmentJob]:
+    return _jobs.get(user_id)
@@ -2,6 +2,7 @@ import httpx
 import logging
 from config.settings import RAPIDAPI_KEY
 from config.constants import RAPIDAPI_HOST
+from services.metrics import track_call
 
 logger = logging.getLogger(__name__)
 
@@ -17,12 +18,13 @@ async def enrich_profile(url: str):
     
     try:
         async with httpx.AsyncClient() as http_client:
-            response = await http_client.get(
-                f"https://{RAPIDAPI_HOST}/get-profile-data-by-url",
-                headers=headers,
-                params={"url": url},
-                timeout=30.0
-            )
+            with track_call("rapidapi", "get_profile"):
+                response = await http_client.get(
+                    f"https://{RAPIDAPI_HOST}/get-profile-data-by-url",
+                    headers=headers,
+                    params={"url": url},
+                    timeout=30.0
+                )
 
             if response.status_code == 200:
                 return response.json()
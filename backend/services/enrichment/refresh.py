@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from datetime import datetime
+from config.constants import (
+    REFRESH_INTERVAL_SECONDS,
+    REFRESH_MIN_AGE_DAYS,
+    REFRESH_DAILY_API_BUDGET,
+    REFRESH_BATCH_SIZE,
+    REFRESH_CANDIDATE_POOL,
+    RATE_LIMIT_SLEEP_SECONDS
+)
+from services.storage import (
+    load_stale_connections,
+    save_enriched_cache,
+    save_cached_profiles,
+    refresh_lock,
+    reserve_refresh_budget,
+    release_refresh_budget
+)
+from services.search import ConnectionSemanticSearch
+from .profile_fetcher import enrich_profile
+from .data_formatter import format_enriched_connection, extract_shared_profile
+
+logger = logging.getLogger(__name__)
+
+def refresh_priority(connection: dict, updated_at: datetime) -> float:
+    """Older and more frequently suggested profiles are refreshed first"""
+    age_days = (datetime.utcnow() - updated_at).total_seconds() / 86400
+    return age_days * (1 + connection.get("suggestion_count", 0))
+
+async def refresh_stale_connections() -> int:
+    """Re-fetch the highest-priority stale profiles within today's API budget"""
+    # Every worker runs the scheduler; one at a time refreshes, so they never pick the same rows
+    async with refresh_lock() as acquired:
+        if not acquired:
+            logger.info("Profile refresh already running in another worker, skipping this cycle")
+            return 0
+        
+        budget = await reserve_refresh_budget(REFRESH_BATCH_SIZE, REFRESH_DAILY_API_BUDGET)
+        if budget == 0:
+            return 0
+        
+        candidates = await load_stale_connections(REFRESH_MIN_AGE_DAYS, REFRESH_CANDIDATE_POOL)
+        candidates.sort(key=lambda item: refresh_priority(item[1], item[2]), reverse=True)
+        selected = candidates[:budget]
+        await release_refresh_budget(budget - len(selected))
+        
+        refreshed_users = {}
+        shared_profiles = {}
+        for user_id, connection, _ in selected:
+            try:
+                enriched_data = await enrich_profile(connection["url"])
+                # Saving bumps updated_at even when the fetch failed, so the profile drops down the queue
+                refreshed = format_enriched_connection(connection, enriched_data) if enriched_data else connection
+                await save_enriched_cache(user_id, {connection["url"]: refreshed})
+                
+                if enriched_data:
+                    shared_profiles[connection["url"]] = extract_shared_profile(refreshed)
+                    if user_id not in refreshed_users:
+                        refreshed_users[user_id] = ConnectionSemanticSearch(user_id)
+                    # Chroma reads/writes and the embedding call block, so run them in a thread
+                    changed = await asyncio.to_thread(refreshed_users[user_id].refresh_connection_embeddings, refreshed)
+                    if changed:
+                        logger.info(f"User {user_id}: re-embedded {changed} for {connection['url']}")
+            except Exception as e:
+                logger.error(f"Failed to refresh {connection['url']}: {str(e)}")
+            
+            await asyncio.sleep(RATE_LIMIT_SLEEP_SECONDS)
+        
+        # Other users enriching the same profiles get the fresh copy, not the one that just went stale
+        try:
+            await save_cached_profiles(shared_profiles)
+        except Exception as e:
+            logger.error(f"Failed to update the shared profile cache: {str(e)}")
+        
+        for semantic_search in refreshed_users.values():
+            await asyncio.to_thread(semantic_search.write_snapshot)
+        
+        logger.info(f"Refreshed {len(selected)} stale profiles")
+        return len(selected)
+
+async def refresh_scheduler():
+    """Periodically refresh stale profiles; runs for the lifetime of the app"""
+    while True:
+        await asyncio.sleep(REFRESH_INTERVAL_SECONDS)
+        try:
+            await refresh_stale_connections()
+        except Exception as e:
+            logger.error(f"Error in profile refresh: {str(e)}")
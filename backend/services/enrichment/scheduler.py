@@ -0,0 +1,150 @@
+import re
+import heapq
+import itertools
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+from config.constants import (
+    ENRICHMENT_PRIORITY_WEIGHTS,
+    ENRICHMENT_RECENCY_HORIZON_DAYS,
+    RECENT_MISSIONS_PER_USER,
+    ENRICHMENT_BUMP_LIMIT
+)
+
+logger = logging.getLogger(__name__)
+
+# Bumped connections jump ahead of anything scored from CSV signals alone
+BUMP_PRIORITY = 100.0
+
+_STOPWORDS = {"the", "and", "for", "with", "who", "are", "that", "any", "not", "find", "people", "someone"}
+
+def _terms(text: str) -> Set[str]:
+    return {word for word in re.findall(r"[a-z0-9]+", (text or "").lower()) if len(word) > 2 and word not in _STOPWORDS}
+
+def _csv_value(connection: dict, field: str) -> str:
+    # Blank CSV cells come through pandas as the string "nan"
+    value = connection.get(field, "") or ""
+    return "" if value == "nan" else value
+
+def _connected_days_ago(connected_on: str) -> Optional[float]:
+    try:
+        return (datetime.utcnow() - datetime.strptime(connected_on, "%d %b %Y")).days
+    except (TypeError, ValueError):
+        return None
+
+def mission_terms(mission: str, mission_attributes: Optional[Dict[str, str]] = None) -> Set[str]:
+    """Words describing a mission, used to match unenriched connections by their CSV fields"""
+    terms = _terms(mission)
+    for attr in ("position", "industry"):
+        terms |= _terms((mission_attributes or {}).get(attr, ""))
+    return terms
+
+def enrichment_priority(connection: dict, recent_terms: List[Set[str]]) -> float:
+    """Score a not-yet-enriched connection from cheap signals already in the CSV"""
+    weights = ENRICHMENT_PRIORITY_WEIGHTS
+    score = 0.0
+
+    days_ago = _connected_days_ago(connection.get("connected_on", ""))
+    if days_ago is not None:
+        score += weights["recency"] * max(0.0, 1 - days_ago / ENRICHMENT_RECENCY_HORIZON_DAYS)
+
+    position = _csv_value(connection, "position")
+    company = _csv_value(connection, "company")
+    if position:
+        score += weights["position"]
+    if company:
+        score += weights["company"]
+
+    # Best overlap with any of the user's recent missions
+    connection_terms = _terms(f"{position} {company}")
+    if connection_terms and recent_terms:
+        overlap = max(len(connection_terms & terms) / len(terms) for terms in recent_terms if terms)
+        score += weights["mission_match"] * overlap
+
+    return score
+
+
+class EnrichmentQueue:
+    """Max-priority queue of one user's pending enrichments; entries can be re-prioritized"""
+    def __init__(self):
+        self._heap = []
+        self._entries: Dict[str, list] = {}
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def push(self, connection: dict, priority: float):
+        url = connection["url"]
+        if url in self._entries:
+            # Keep the higher priority; the stale heap entry is skipped when popped
+            if self._entries[url][0] <= -priority:
+                return
+            self._entries[url][2] = None
+        # The counter keeps CSV order among equal priorities
+        entry = [-priority, next(self._counter), connection]
+        self._entries[url] = entry
+        heapq.heappush(self._heap, entry)
+
+    def pop(self) -> Optional[dict]:
+        while self._heap:
+            _, _, connection = heapq.heappop(self._heap)
+            if connection is not None:
+                del self._entries[connection["url"]]
+                return connection
+        return None
+
+    def pending(self) -> List[dict]:
+        return [entry[2] for entry in self._entries.values()]
+
+
+class EnrichmentScheduler:
+    """Per-user enrichment queues plus the recent missions used to order them"""
+    def __init__(self):
+        self._queues: Dict[str, EnrichmentQueue] = {}
+        self._recent_missions: Dict[str, deque] = {}
+
+    def queue(self, user_id: str) -> EnrichmentQueue:
+        return self._queues.setdefault(user_id, EnrichmentQueue())
+
+    def enqueue(self, user_id: str, connections: List[dict]):
+        recent_terms = list(self._recent_missions.get(user_id, []))
+        queue = self.queue(user_id)
+        for connection in connections:
+            queue.push(connection, enrichment_priority(connection, recent_terms))
+
+    def next(self, user_id: str) -> Optional[dict]:
+        queue = self._queues.get(user_id)
+        return queue.pop() if queue else None
+
+    def discard(self, user_id: str):
+        self._queues.pop(user_id, None)
+
+    def bump_for_mission(self, user_id: str, mission: str, mission_attributes: Optional[Dict[str, str]] = None) -> int:
+        """Remember the mission and move pending connections that match it to the front"""
+        terms = mission_terms(mission, mission_attributes)
+        if not terms:
+            return 0
+        self._recent_missions.setdefault(user_id, deque(maxlen=RECENT_MISSIONS_PER_USER)).append(terms)
+
+        queue = self._queues.get(user_id)
+        if not queue:
+            return 0
+
+        matches = []
+        for connection in queue.pending():
+            overlap = len(_terms(f"{_csv_value(connection, 'position')} {_csv_value(connection, 'company')}") & terms)
+            if overlap:
+                matches.append((overlap, connection))
+        matches.sort(key=lambda match: match[0], reverse=True)
+
+        for overlap, connection in matches[:ENRICHMENT_BUMP_LIMIT]:
+            queue.push(connection, BUMP_PRIORITY + overlap)
+
+        if matches:
+            logger.info(f"User {user_id}: moved {min(len(matches), ENRICHMENT_BUMP_LIMIT)} pending connections to the front of enrichment")
+        return min(len(matches), ENRICHMENT_BUMP_LIMIT)
+
+
+enrichment_scheduler = EnrichmentScheduler()
@@ -1,13 +1,22 @@
 from .embeddings import EmbeddingManager
 from .semantic import SemanticSearch
-from config.constants import N_RESULTS
+from .mission_cache import mission_cache, connections_fingerprint
+from .reranker import rerank_connections, rerank_gap, is_decisive
+from .query_embeddings import query_embedding_cache
+from .scoring import sharded_scorer
+from config.constants import N_RESULTS, VECTOR_BACKEND
 
 class ConnectionSemanticSearch:
     """User-specific semantic search for connections"""
     def __init__(self, user_id: str):
         self.user_id = user_id
-        self.embedding_manager = EmbeddingManager(user_id)
-        self.semantic_search = SemanticSearch(user_id)
+        if VECTOR_BACKEND == "pgvector":
+            from .pgvector_store import PgVectorEmbeddingManager, PgVectorSemanticSearch
+            self.embedding_manager = PgVectorEmbeddingManager(user_id)
+            self.semantic_search = PgVectorSemanticSearch(user_id, self.embedding_manager)
+        else:
+            self.embedding_manager = EmbeddingManager(user_id)
+            self.semantic_search = SemanticSearch(user_id, self.embedding_manager)
     
     def is_connection_vectorized(self, connection_url: str) -> bool:
         return self.embedding_manager.is_connection_vectorized(connection_url)
@@ -21,10 +30,29 @@ class ConnectionSemanticSearch:
     def store_connection_embeddings(self, connection):
         return self.embedding_manager.store_connection_embeddings(connection)
     
+    def store_connections_embeddings(self, connections):
+        return self.embedding_manager.store_connections_embeddings(connections)
+    
+    def refresh_connection_embeddings(self, connection):
+        return self.embedding_manager.refresh_connection_embeddings(connection)
+    
+    def write_snapshot(self):
+        return self.embedding_manager.write_snapshot()
+    
     def extract_mission_attributes(self, mission: str):
         return self.semantic_search.extract_mission_attributes(mission)
     
-    def search_top_connections(self, mission_attributes, n_results: int = N_RESULTS):
-        return self.semantic_search.search_top_connections(mission_attributes, n_results)
+    def search_top_connections(self, mission_attributes, n_results: int = N_RESULTS, query_embeddings=None):
+        return self.semantic_search.search_top_connections(mission_attributes, n_results, query_embeddings)
+    
+    def preload(self):
+        return self.semantic_search.preload()
+    
+    def open_collections(self):
+        return self.embedding_manager.open_collections()
 
-__all__ = ['ConnectionSemanticSearch', 'EmbeddingManager', 'SemanticSearch']
\ No newline at end of file
+__all__ = [
+    'ConnectionSemanticSearch', 'EmbeddingManager', 'SemanticSearch',
+    'mission_cache', 'connections_fingerprint', 'rerank_connections', 'rerank_gap', 'is_decisive',
+    'query_embedding_cache', 'sharded_scorer'
+]
\ No newline at end of file
@@ -0,0 +1,149 @@
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from config.settings import chroma_client
+from config.constants import CHROMA_STORAGE_MODE, OPEN_COLLECTIONS_MAX
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_METADATA = {"hnsw:space": "cosine"}
+
+
+class _CachedCollection:
+    """Cached collection handle that reopens itself when the collection was deleted or recreated
+
+    Stale handles (e.g. after migrate_collections) otherwise keep failing until evicted.
+    """
+    def __init__(self, name: str, collection):
+        self._name = name
+        self._collection = collection
+
+    def _reopen(self):
+        collection = chroma_client.get_or_create_collection(name=self._name, metadata=COLLECTION_METADATA)
+        if collection.id == self._collection.id:
+            return None
+        logger.info(f"Reopened collection {self._name} after it was recreated")
+        self._collection = collection
+        return collection
+
+    def __getattr__(self, attr: str):
+        value = getattr(self._collection, attr)
+        if not callable(value):
+            return value
+
+        def call(*args, **kwargs):
+            try:
+                return value(*args, **kwargs)
+            except Exception:
+                reopened = self._reopen()
+                if reopened is None:
+                    raise
+                return getattr(reopened, attr)(*args, **kwargs)
+        return call
+
+
+# Collection handles by client and name, so repeat requests skip the get_or_create round trip
+_open_collections: "OrderedDict[tuple, _CachedCollection]" = OrderedDict()
+_open_lock = threading.Lock()
+
+
+def get_collection(name: str):
+    """get_or_create_collection, reusing handles opened earlier in this process"""
+    key = (id(chroma_client.get()), name)
+    with _open_lock:
+        collection = _open_collections.get(key)
+        if collection is not None:
+            _open_collections.move_to_end(key)
+            return collection
+
+    collection = _CachedCollection(name, chroma_client.get_or_create_collection(name=name, metadata=COLLECTION_METADATA))
+    with _open_lock:
+        _open_collections[key] = collection
+        while len(_open_collections) > OPEN_COLLECTIONS_MAX:
+            _open_collections.popitem(last=False)
+    return collection
+
+
+def per_user_collection_name(user_id: str, attr: str) -> str:
+    return f"user_{user_id}_connections_{attr}"
+
+
+def consolidated_collection_name(attr: str) -> str:
+    return f"connections_{attr}"
+
+
+class TenantCollection:
+    """One user's slice of a collection shared by every user
+
+    Exposes the subset of the Chroma collection API used by the search services, with
+    IDs prefixed by the user id and every read filtered on the user_id metadata field.
+    """
+    def __init__(self, collection, user_id: str):
+        self.collection = collection
+        self.user_id = user_id
+        self._prefix = f"{user_id}:"
+
+    @property
+    def name(self) -> str:
+        return self.collection.name
+
+    def _ids(self, ids: List[str]) -> List[str]:
+        return [self._prefix + conn_id for conn_id in ids]
+
+    def _strip(self, ids: List[str]) -> List[str]:
+        return [conn_id[len(self._prefix):] for conn_id in ids]
+
+    def _metadatas(self, metadatas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [{**metadata, "user_id": self.user_id} for metadata in metadatas]
+
+    def _where(self) -> Dict[str, str]:
+        return {"user_id": self.user_id}
+
+    def count(self) -> int:
+        return len(self.collection.get(where=self._where(), include=[])["ids"])
+
+    def get(self, ids: Optional[List[str]] = None, include: Optional[List[str]] = None):
+        kwargs = {"include": include} if include is not None else {}
+        if ids is not None:
+            # Prefixed IDs already pin the tenant
+            result = self.collection.get(ids=self._ids(ids), **kwargs)
+        else:
+            result = self.collection.get(where=self._where(), **kwargs)
+        result["ids"] = self._strip(result["ids"])
+        return result
+
+    def upsert(self, ids: List[str], embeddings, documents: List[str], metadatas: List[Dict[str, Any]]):
+        return self.collection.upsert(
+            ids=self._ids(ids), embeddings=embeddings, documents=documents, metadatas=self._metadatas(metadatas)
+        )
+
+    def update(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        return self.collection.update(ids=self._ids(ids), metadatas=self._metadatas(metadatas))
+
+    def delete(self, ids: Optional[List[str]] = None):
+        if ids is not None:
+            return self.collection.delete(ids=self._ids(ids))
+        return self.collection.delete(where=self._where())
+
+    def query(self, query_embeddings, n_results: int, include: Optional[List[str]] = None):
+        kwargs = {"include": include} if include is not None else {}
+        result = self.collection.query(
+            query_embeddings=query_embeddings, n_results=n_results, where=self._where(), **kwargs
+        )
+        result["ids"] = [self._strip(ids) for ids in result["ids"]]
+        return result
+
+
+def open_user_collections(user_id: str, attributes: List[str]) -> Dict[str, Any]:
+    """Collections holding a user's vectors for each attribute, in the configured storage mode"""
+    collections = {}
+    for attr in attributes:
+        try:
+            if CHROMA_STORAGE_MODE == "consolidated":
+                collections[attr] = TenantCollection(get_collection(consolidated_collection_name(attr)), user_id)
+            else:
+                collections[attr] = get_collection(per_user_collection_name(user_id, attr))
+        except Exception as e:
+            logger.error(f"Failed to initialize collection for {attr}: {e}")
+    return collections
@@ -1,31 +1,52 @@
-import chromadb
+import hashlib
 import logging
 from typing import List, Dict, Any
 # from config.settings import chroma_client, embedding_model
-from config.settings import chroma_client, get_embeddings
+from config.settings import get_embeddings
+from config.constants import SHARED_EMBEDDING_CACHE_ENABLED, SHARED_EMBEDDING_COLLECTION
+from .snapshot import write_user_snapshot, mark_user_snapshot_stale
+from .collections import open_user_collections, get_collection
+from services.metrics import track_call
 
 
 logger = logging.getLogger(__name__)
 
 class EmbeddingManager:
+    ATTRIBUTES = ['summary', 'position', 'location', 'industry']
+    
     def __init__(self, user_id: str = None): 
         self.user_id = user_id or "default"
-        self.collections = {}
-        self.attributes = ['summary', 'position', 'location', 'industry']
+        self.attributes = list(self.ATTRIBUTES)
         self._init_collections()
         
     def _init_collections(self):
-        """Initialize ChromaDB collections for each attribute"""
-        for attr in self.attributes:
+        """Collections are opened on first use; snapshot searches never need them"""
+        self._collections = None
+        self._shared_collection = None
+        self._shared_opened = not SHARED_EMBEDDING_CACHE_ENABLED
+    
+    @property
+    def collections(self) -> Dict[str, Any]:
+        """ChromaDB collections for each attribute"""
+        if self._collections is None:
+            # Per-user collections, or the user's slice of one shared collection per attribute
+            self._collections = open_user_collections(self.user_id, self.attributes)
+        return self._collections
+    
+    def open_collections(self) -> Dict[str, Any]:
+        """Open the collections now instead of on first use"""
+        return self.collections
+    
+    @property
+    def shared_collection(self):
+        # Content-addressed vectors shared by every user, keyed by text hash
+        if not self._shared_opened:
+            self._shared_opened = True
             try:
-                # Make collections user-specific
-                collection_name = f"user_{self.user_id}_connections_{attr}"
-                self.collections[attr] = chroma_client.get_or_create_collection(
-                    name=collection_name,
-                    metadata={"hnsw:space": "cosine"}
-                )
+                self._shared_collection = get_collection(SHARED_EMBEDDING_COLLECTION)
             except Exception as e:
-                logger.error(f"Failed to initialize collection for {attr}: {e}")
+                logger.error(f"Failed to initialize shared embedding collection: {e}")
+        return self._shared_collection
     
     def is_connection_vectorized(self, connection_url: str) -> bool:
         conn_id = connection_url.replace('https://www.linkedin.com/in/', '')
@@ -57,43 +78,137 @@ class EmbeddingManager:
         logger.info(f"Found {len(unvectorized)} connections needing vectorization")
         return unvectorized
 
+    @staticmethod
+    def attribute_texts(connection: Dict[str, Any]) -> Dict[str, str]:
+        """Text embedded for each attribute of a connection"""
+        return {
+            'summary': connection.get('summary', '') or 'N/A',
+            'position': connection.get('headline', '') or connection.get('position', '') or 'N/A',
+            'location': connection.get('location', '') or 'N/A',
+            'industry': connection.get('industry', '') or 'N/A'
+        }
+    
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+    
+    def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, reusing vectors any user already paid for"""
+        if not self._shares_embeddings():
+            with track_call("openai", "embeddings"):
+                return get_embeddings(texts)
+        
+        hashes = [self.text_hash(text) for text in texts]
+        text_by_hash = dict(zip(hashes, texts))
+        vectors = self._load_shared_embeddings(list(text_by_hash))
+        
+        missing = [h for h in text_by_hash if h not in vectors]
+        if missing:
+            with track_call("openai", "embeddings"):
+                embeddings = get_embeddings([text_by_hash[h] for h in missing])
+            for h, embedding in zip(missing, embeddings):
+                vectors[h] = embedding
+            self._save_shared_embeddings({h: vectors[h] for h in missing})
+        
+        return [vectors[h] for h in hashes]
+    
+    # Content-addressed store behind _embed_texts; the pgvector manager keeps it in Postgres
+    def _shares_embeddings(self) -> bool:
+        return self.shared_collection is not None
+    
+    def _load_shared_embeddings(self, hashes: List[str]) -> Dict[str, List[float]]:
+        with track_call("chroma", "get_shared"):
+            cached = self.shared_collection.get(ids=hashes, include=['embeddings'])
+        return {h: list(e) for h, e in zip(cached['ids'], cached['embeddings'])}
+    
+    def _save_shared_embeddings(self, vectors: Dict[str, List[float]]):
+        with track_call("chroma", "upsert_shared"):
+            self.shared_collection.upsert(ids=list(vectors), embeddings=list(vectors.values()))
+    
+    def _metadata(self, connection: Dict[str, Any], text: str) -> Dict[str, str]:
+        return {
+            'name': f"{connection.get('first_name', '')} {connection.get('last_name', '')}",
+            'company': connection.get('current_company', '') or connection.get('company', ''),
+            'url': connection.get('url', ''),
+            'text_hash': self.text_hash(text)
+        }
+
     def store_connection_embeddings(self, connection: Dict[str, Any]):
         """Store embeddings for a single connection across all attributes"""
-        conn_id = connection.get('url', '').replace('https://www.linkedin.com/in/', '')
-        if not conn_id:
-            return False
+        return self.store_connections_embeddings([connection]) == 1
+    
+    def store_connections_embeddings(self, connections: List[Dict[str, Any]]) -> int:
+        """Embed many connections with one API call and one upsert per attribute; returns how many were stored"""
+        rows = {}
+        for connection in connections:
+            conn_id = connection.get('url', '').replace('https://www.linkedin.com/in/', '')
+            if conn_id:
+                # A later copy of the same connection wins, as it would with one upsert each
+                rows[conn_id] = (connection, self.attribute_texts(connection))
+        if not rows:
+            return 0
         
         try:
-            # Prepare texts for each attribute
-            texts = {
-                'summary': connection.get('summary', '') or 'N/A',
-                'position': connection.get('headline', '') or connection.get('position', '') or 'N/A',
-                'location': connection.get('location', '') or 'N/A',
-                'industry': connection.get('industry', '') or 'N/A'
-            }
-            
-            # Get all embeddings in parallel (single API call)
-            text_list = [texts[attr] for attr in self.attributes]
-            embeddings = get_embeddings(text_list)
+            # Get all embeddings in parallel (at most one API call)
+            text_list = [texts[attr] for _, texts in rows.values() for attr in self.attributes]
+            embeddings = self._embed_texts(text_list)
             
             # Store embeddings in each collection
             for i, attr in enumerate(self.attributes):
-                self.collections[attr].upsert(
-                    ids=[conn_id],
-                    embeddings=[embeddings[i]],
-                    documents=[texts[attr]],
-                    metadatas=[{
-                        'name': f"{connection.get('first_name', '')} {connection.get('last_name', '')}",
-                        'company': connection.get('current_company', '') or connection.get('company', ''),
-                        'url': connection.get('url', '')
-                    }]
-                )
+                with track_call("chroma", "upsert"):
+                    self.collections[attr].upsert(
+                        ids=list(rows),
+                        embeddings=embeddings[i::len(self.attributes)],
+                        documents=[texts[attr] for _, texts in rows.values()],
+                        metadatas=[self._metadata(connection, texts[attr]) for connection, texts in rows.values()]
+                    )
             
-            return True
+            mark_user_snapshot_stale(self.user_id)
+            return len(rows)
             
         except Exception as e:
-            logger.error(f"Failed to store embeddings for {conn_id}: {e}")
-            return False
+            logger.error(f"Failed to store embeddings for {len(rows)} connections: {e}")
+            if len(rows) == 1:
+                return 0
+            # One bad item shouldn't cost the whole batch; vectors already in the shared collection are reused
+            return sum(self.store_connections_embeddings([connection]) for connection, _ in rows.values())
+
+    def refresh_connection_embeddings(self, connection: Dict[str, Any]) -> List[str]:
+        """Re-embed only the attributes whose text changed; returns the changed attributes"""
+        conn_id = connection.get('url', '').replace('https://www.linkedin.com/in/', '')
+        if not conn_id:
+            return []
+        
+        try:
+            texts = self.attribute_texts(connection)
+            changed = []
+            for attr in self.attributes:
+                with track_call("chroma", "get"):
+                    existing = self.collections[attr].get(ids=[conn_id], include=['metadatas'])
+                stored_hash = existing['metadatas'][0].get('text_hash') if existing['ids'] else None
+                if stored_hash != self.text_hash(texts[attr]):
+                    changed.append(attr)
+                else:
+                    # Text unchanged: keep the vector, but name/company may have moved
+                    self.collections[attr].update(ids=[conn_id], metadatas=[self._metadata(connection, texts[attr])])
+            
+            if changed:
+                embeddings = self._embed_texts([texts[attr] for attr in changed])
+                for attr, embedding in zip(changed, embeddings):
+                    with track_call("chroma", "upsert"):
+                        self.collections[attr].upsert(
+                            ids=[conn_id],
+                            embeddings=[embedding],
+                            documents=[texts[attr]],
+                            metadatas=[self._metadata(connection, texts[attr])]
+                        )
+                mark_user_snapshot_stale(self.user_id)
+            
+            return changed
+        
+        except Exception as e:
+            logger.error(f"Failed to refresh embeddings for {conn_id}: {e}")
+            return []
         
     def batch_store_embeddings(self, connections: List[Dict[str, Any]]):
         """Store embeddings for multiple connections in batches"""
@@ -103,10 +218,10 @@ class EmbeddingManager:
             batch = connections[i:i + batch_size]
             logger.info(f"Vectorizing batch {i//batch_size + 1}/{(len(connections) + batch_size - 1)//batch_size}")
             
-            for connection in batch:
-                try:
-                    self.store_connection_embeddings(connection)
-                except Exception as e:
-                    logger.error(f"Failed to vectorize connection {connection.get('url', '')}: {e}")
+            self.store_connections_embeddings(batch)
         
-        logger.info(f"Completed vectorization of {len(connections)} connections")
\ No newline at end of file
+        logger.info(f"Completed vectorization of {len(connections)} connections")
+
+    def write_snapshot(self) -> bool:
+        """Write the memory-mapped vector snapshot used for fast cold-start search"""
+        return write_user_snapshot(self.user_id, self.collections, self.attributes)
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""Move per-user Chroma collections into the consolidated layout.
+
+Run from the backend directory, then set CHROMA_STORAGE_MODE = "consolidated":
+
+    python -m services.search.migrate_collections            # copy and verify
+    python -m services.search.migrate_collections --delete   # also drop the per-user collections
+
+Copying is idempotent (upserts), so an interrupted run can simply be repeated.
+"""
+import re
+import argparse
+import logging
+from typing import Dict, List, Tuple
+from config.settings import chroma_client
+from .collections import TenantCollection, COLLECTION_METADATA, consolidated_collection_name
+from .embeddings import EmbeddingManager
+
+logger = logging.getLogger(__name__)
+
+PER_USER_PATTERN = re.compile(r"^user_(?P<user_id>.+)_connections_(?P<attr>[a-z]+)$")
+
+
+def find_per_user_collections(attributes: List[str]) -> List[Tuple[str, str, str]]:
+    """(collection name, user id, attribute) for every collection in the per-user layout"""
+    found = []
+    for collection in chroma_client.list_collections():
+        # chromadb < 0.6 returns Collection objects, later versions return names
+        name = getattr(collection, "name", collection)
+        match = PER_USER_PATTERN.match(name)
+        if match and match.group("attr") in attributes:
+            found.append((name, match.group("user_id"), match.group("attr")))
+    return sorted(found)
+
+
+def migrate_collection(name: str, user_id: str, attr: str, batch_size: int) -> int:
+    """Copy one per-user collection into the consolidated one; returns the rows copied"""
+    source = chroma_client.get_collection(name)
+    target = TenantCollection(
+        chroma_client.get_or_create_collection(name=consolidated_collection_name(attr), metadata=COLLECTION_METADATA),
+        user_id
+    )
+    total = source.count()
+    for offset in range(0, total, batch_size):
+        page = source.get(limit=batch_size, offset=offset, include=["embeddings", "documents", "metadatas"])
+        if page["ids"]:
+            target.upsert(ids=page["ids"], embeddings=page["embeddings"], documents=page["documents"], metadatas=page["metadatas"])
+
+    copied = target.count()
+    if copied < total:
+        raise RuntimeError(f"{name}: only {copied} of {total} rows present after copying")
+    return total
+
+
+def migrate(delete_source: bool = False, batch_size: int = 500) -> Dict[str, int]:
+    attributes = EmbeddingManager.ATTRIBUTES
+    sources = find_per_user_collections(attributes)
+    logger.info(f"Migrating {len(sources)} per-user collections")
+
+    summary = {"collections": 0, "rows": 0, "failed": 0}
+    for name, user_id, attr in sources:
+        try:
+            summary["rows"] += migrate_collection(name, user_id, attr, batch_size)
+            summary["collections"] += 1
+            if delete_source:
+                chroma_client.delete_collection(name)
+        except Exception as e:
+            summary["failed"] += 1
+            logger.error(f"Failed to migrate {name}: {e}")
+
+    logger.info(f"Migrated {summary['rows']} rows from {summary['collections']} collections ({summary['failed']} failed)")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consolidate per-user Chroma collections into one collection per attribute.")
+    parser.add_argument("--delete", action="store_true", help="Delete each per-user collection once it is copied and verified")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows read and upserted per request")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    summary = migrate(delete_source=args.delete, batch_size=args.batch_size)
+    if summary["failed"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
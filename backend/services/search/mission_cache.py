@@ -0,0 +1,111 @@
+import logging
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from config.constants import (
+    MISSION_CACHE_SIMILARITY_THRESHOLD,
+    MISSION_CACHE_MAX_ENTRIES_PER_USER,
+    MISSION_CACHE_MAX_USERS
+)
+
+logger = logging.getLogger(__name__)
+
+# The summary attribute is the mission text itself, which the embedding already compares
+MATCHED_ATTRIBUTES = ("position", "location", "industry")
+
+
+def connections_fingerprint(enriched_cache: Dict[str, dict]) -> str:
+    """Order-independent fingerprint of a user's connection set, enrichment state and row versions"""
+    # Process-local hashing is fine because the cache itself is process-local.
+    # updated_at changes whenever a row is saved, so refreshed or re-enriched profiles change it too
+    total = 0
+    for url, conn in enriched_cache.items():
+        row = (url, bool(conn.get("enriched", False)), getattr(conn, "updated_at", None))
+        total = (total + hash(row)) & 0xFFFFFFFFFFFFFFFF
+    return f"{len(enriched_cache)}:{total:x}"
+
+
+class MissionCache:
+    """Per-user LRU cache of mission results, matched by embedding similarity"""
+    def __init__(self, threshold: float, max_entries_per_user: int, max_users: int):
+        self.threshold = threshold
+        self.max_entries_per_user = max_entries_per_user
+        self.max_users = max_users
+        self._users: "OrderedDict[str, OrderedDict[str, Dict[str, Any]]]" = OrderedDict()
+
+    def lookup(self, user_id: str, mission_embedding: List[float], fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Return the most similar cached mission above the threshold, if any"""
+        entries = self._users.get(user_id)
+        if not entries:
+            return None
+
+        # Results computed against a different connection set are no longer valid
+        stale = [mission for mission, entry in entries.items() if entry["fingerprint"] != fingerprint]
+        for mission in stale:
+            del entries[mission]
+        if not entries:
+            return None
+
+        query = np.asarray(mission_embedding, dtype=np.float32)
+        query /= (np.linalg.norm(query) or 1.0)
+        missions = list(entries)
+        matrix = np.stack([entries[mission]["embedding"] for mission in missions])
+        similarities = matrix @ query
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+
+        mission = missions[best]
+        entries.move_to_end(mission)
+        self._users.move_to_end(user_id)
+        logger.info(f"User {user_id}: mission cache hit on '{mission}' (similarity {similarities[best]:.3f})")
+        return {**entries[mission], "similarity": float(similarities[best])}
+
+    @staticmethod
+    def same_mission(cached: Dict[str, Any], mission: str, mission_attributes: Optional[Dict[str, str]] = None) -> bool:
+        """Whether a cached entry answers this mission: same text, or the same extracted attributes"""
+        if cached["mission"].strip().lower() == mission.strip().lower():
+            return True
+        if mission_attributes is None:
+            return False
+        # Near-identical wording can still name another role, city or industry
+        cached_attributes = cached.get("mission_attributes") or {}
+        return all(
+            str(cached_attributes.get(field) or "").strip().lower() == str(mission_attributes.get(field) or "").strip().lower()
+            for field in MATCHED_ATTRIBUTES
+        )
+
+    def store(self, user_id: str, mission: str, mission_embedding: List[float], fingerprint: str, **results):
+        """Remember the results for a mission, evicting least recently used entries"""
+        embedding = np.asarray(mission_embedding, dtype=np.float32)
+        embedding /= (np.linalg.norm(embedding) or 1.0)
+
+        entries = self._users.setdefault(user_id, OrderedDict())
+        entries[mission] = {"mission": mission, "embedding": embedding, "fingerprint": fingerprint, **results}
+        entries.move_to_end(mission)
+        while len(entries) > self.max_entries_per_user:
+            entries.popitem(last=False)
+
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+
+    def recent_attributes(self, user_id: str) -> List[Dict[str, str]]:
+        """Mission attributes of the user's cached missions, most recent first"""
+        entries = self._users.get(user_id) or {}
+        return [entry["mission_attributes"] for entry in reversed(entries.values()) if entry.get("mission_attributes")]
+
+    def discard(self, user_id: str, mission: str):
+        entries = self._users.get(user_id)
+        if entries:
+            entries.pop(mission, None)
+
+    def invalidate(self, user_id: str):
+        self._users.pop(user_id, None)
+
+
+mission_cache = MissionCache(
+    threshold=MISSION_CACHE_SIMILARITY_THRESHOLD,
+    max_entries_per_user=MISSION_CACHE_MAX_ENTRIES_PER_USER,
+    max_users=MISSION_CACHE_MAX_USERS
+)
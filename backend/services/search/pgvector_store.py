@@ -0,0 +1,255 @@
+import logging
+import uuid
+import operator
+import functools
+from datetime import datetime
+from typing import Any, Dict, List
+from sqlalchemy import select, union, and_, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from config.database import vector_connection
+from config.constants import (
+    N_RESULTS,
+    SHARED_EMBEDDING_CACHE_ENABLED,
+    PGVECTOR_CANDIDATES_PER_ATTRIBUTE,
+    PGVECTOR_EF_SEARCH,
+    PGVECTOR_ITERATIVE_SCAN
+)
+from models.database import ConnectionEmbedding, SharedEmbedding, UserConnection
+from services.metrics import span, track_call
+from .embeddings import EmbeddingManager
+from .semantic import SemanticSearch
+from .query_embeddings import query_embedding_cache
+
+logger = logging.getLogger(__name__)
+
+embeddings_table = ConnectionEmbedding.__table__
+connections_table = UserConnection.__table__
+shared_table = SharedEmbedding.__table__
+
+
+def _embedding_column(attr: str):
+    return embeddings_table.c[f"{attr}_embedding"]
+
+
+class PgVectorEmbeddingManager(EmbeddingManager):
+    """EmbeddingManager that keeps vectors in the connection_embeddings table instead of Chroma"""
+    def _init_collections(self):
+        # Vectors live in Postgres: no Chroma collections, shared or per user
+        self._collections = {}
+        self._shared_collection = None
+        self._shared_opened = True
+        self._user_uuid = uuid.UUID(str(self.user_id))
+
+    def _shares_embeddings(self) -> bool:
+        return SHARED_EMBEDDING_CACHE_ENABLED
+
+    def _load_shared_embeddings(self, hashes: List[str]) -> Dict[str, List[float]]:
+        statement = select(shared_table.c.text_hash, shared_table.c.embedding).where(shared_table.c.text_hash.in_(hashes))
+        with vector_connection() as conn, track_call("postgres", "get_shared_embeddings"):
+            return {row.text_hash: list(row.embedding) for row in conn.execute(statement)}
+
+    def _save_shared_embeddings(self, vectors: Dict[str, List[float]]):
+        statement = pg_insert(shared_table).values(
+            [{"text_hash": h, "embedding": embedding} for h, embedding in vectors.items()]
+        ).on_conflict_do_nothing(index_elements=["text_hash"])
+        with vector_connection(begin=True) as conn, track_call("postgres", "upsert_shared_embeddings"):
+            conn.execute(statement)
+
+    def is_connection_vectorized(self, connection_url: str) -> bool:
+        return connection_url in self._vectorized_urls([connection_url])
+
+    def _vectorized_urls(self, urls: List[str] = None) -> set:
+        statement = select(embeddings_table.c.url).where(
+            embeddings_table.c.user_id == self._user_uuid,
+            *[_embedding_column(attr).isnot(None) for attr in self.attributes]
+        )
+        if urls is not None:
+            statement = statement.where(embeddings_table.c.url.in_(urls))
+        with vector_connection() as conn, track_call("postgres", "vectorized_urls"):
+            return {row.url for row in conn.execute(statement)}
+
+    def get_unvectorized_connections(self, enriched_connections: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Get list of enriched connections that need vectorization (one query for all of them)"""
+        try:
+            vectorized = self._vectorized_urls()
+        except Exception as e:
+            logger.error(f"Error checking vectorization for user {self.user_id}: {e}")
+            return []
+        unvectorized = [
+            connection for url, connection in enriched_connections.items()
+            if connection.get("enriched", False) and url not in vectorized
+        ]
+        logger.info(f"Found {len(unvectorized)} connections needing vectorization")
+        return unvectorized
+
+    def _upsert(self, rows: List[Dict[str, Any]], attributes: List[str]):
+        statement = pg_insert(embeddings_table).values(rows)
+        updated = {f"{attr}_embedding": statement.excluded[f"{attr}_embedding"] for attr in attributes}
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id", "url"],
+            set_={
+                **updated,
+                # Merge so a partial refresh keeps the hashes of untouched attributes
+                "text_hashes": embeddings_table.c.text_hashes.op("||")(statement.excluded.text_hashes),
+                "updated_at": statement.excluded.updated_at
+            }
+        )
+        with vector_connection(begin=True) as conn, track_call("postgres", "upsert_embeddings"):
+            conn.execute(statement)
+
+    def store_connections_embeddings(self, connections: List[Dict[str, Any]]) -> int:
+        """Embed many connections with one API call and one multi-row upsert"""
+        rows = {}
+        for connection in connections:
+            if connection.get('url'):
+                rows[connection['url']] = self.attribute_texts(connection)
+        if not rows:
+            return 0
+
+        try:
+            text_list = [texts[attr] for texts in rows.values() for attr in self.attributes]
+            embeddings = self._embed_texts(text_list)
+            values = []
+            for i, (url, texts) in enumerate(rows.items()):
+                offset = i * len(self.attributes)
+                values.append({
+                    "user_id": self._user_uuid,
+                    "url": url,
+                    **{f"{attr}_embedding": embeddings[offset + j] for j, attr in enumerate(self.attributes)},
+                    "text_hashes": {attr: self.text_hash(texts[attr]) for attr in self.attributes},
+                    "updated_at": datetime.utcnow()
+                })
+            self._upsert(values, self.attributes)
+            return len(values)
+
+        except Exception as e:
+            logger.error(f"Failed to store embeddings for {len(rows)} connections: {e}")
+            if len(rows) == 1:
+                return 0
+            # One bad item shouldn't cost the whole batch
+            latest = {connection['url']: connection for connection in connections if connection.get('url')}
+            return sum(self.store_connections_embeddings([connection]) for connection in latest.values())
+
+    def refresh_connection_embeddings(self, connection: Dict[str, Any]) -> List[str]:
+        """Re-embed only the attributes whose text changed; returns the changed attributes"""
+        url = connection.get('url', '')
+        if not url:
+            return []
+
+        try:
+            texts = self.attribute_texts(connection)
+            statement = select(embeddings_table.c.text_hashes).where(
+                embeddings_table.c.user_id == self._user_uuid, embeddings_table.c.url == url
+            )
+            with vector_connection() as conn:
+                stored = conn.execute(statement).scalar() or {}
+            changed = [attr for attr in self.attributes if stored.get(attr) != self.text_hash(texts[attr])]
+
+            if changed:
+                embeddings = self._embed_texts([texts[attr] for attr in changed])
+                self._upsert([{
+                    "user_id": self._user_uuid,
+                    "url": url,
+                    **{f"{attr}_embedding": embedding for attr, embedding in zip(changed, embeddings)},
+                    "text_hashes": {attr: self.text_hash(texts[attr]) for attr in changed},
+                    "updated_at": datetime.utcnow()
+                }], changed)
+            return changed
+
+        except Exception as e:
+            logger.error(f"Failed to refresh embeddings for {url}: {e}")
+            return []
+
+    def write_snapshot(self) -> bool:
+        # Search runs inside Postgres, there is no local snapshot to maintain
+        return False
+
+
+class PgVectorSemanticSearch(SemanticSearch):
+    """SemanticSearch that scores connections with a single SQL query over connection_embeddings"""
+    def search_top_connections(self, mission_attributes: Dict[str, str], n_results: int = N_RESULTS,
+                               query_embeddings: Dict[str, List[float]] = None) -> List[Dict]:
+        query_embeddings = query_embeddings or {}
+        query_attrs = [
+            attr for attr in self.embedding_manager.attributes
+            if mission_attributes.get(attr, 'N/A') != 'N/A'
+        ]
+        if not query_attrs:
+            return []
+
+        missing = [attr for attr in query_attrs if attr not in query_embeddings]
+        if missing:
+            query_embeddings = {
+                **query_embeddings,
+                **dict(zip(missing, query_embedding_cache.embed([mission_attributes[attr] for attr in missing])))
+            }
+
+        try:
+            statement = self._search_statement(query_attrs, query_embeddings, n_results)
+            with span("search", "pgvector_query"), vector_connection(begin=True) as conn, track_call("postgres", "vector_search"):
+                # Filtered HNSW scans need a wider beam (and iterative scans) to return enough rows per user
+                conn.execute(text("SELECT set_config('hnsw.ef_search', :value, true)"), {"value": str(PGVECTOR_EF_SEARCH)})
+                if PGVECTOR_ITERATIVE_SCAN:
+                    conn.execute(text("SELECT set_config('hnsw.iterative_scan', :value, true)"), {"value": PGVECTOR_ITERATIVE_SCAN})
+                rows = conn.execute(statement).all()
+        except Exception as e:
+            logger.error(f"Failed to search connection embeddings for user {self.user_id}: {e}")
+            return []
+
+        logger.info(f"Found {len(rows)} top connections from pgvector")
+
+        return [
+            {
+                'id': row.url.replace('https://www.linkedin.com/in/', ''),
+                'similarity_score': float(row.total_similarity),
+                'attribute_scores': {attr: float(getattr(row, f"{attr}_score")) for attr in query_attrs},
+                'name': f"{row.first_name} {row.last_name}",
+                'company': (row.profile_data or {}).get('current_company') or row.company or '',
+                'url': row.url
+            }
+            for row in rows
+        ]
+
+    def _search_statement(self, query_attrs: List[str], query_embeddings: Dict[str, List[float]], n_results: int):
+        user_uuid = uuid.UUID(str(self.user_id))
+
+        # Candidates: the nearest rows for each queried attribute, each found through its HNSW index
+        candidates = union(*[
+            select(embeddings_table.c.url)
+            .where(embeddings_table.c.user_id == user_uuid)
+            .order_by(_embedding_column(attr).cosine_distance(query_embeddings[attr]))
+            .limit(PGVECTOR_CANDIDATES_PER_ATTRIBUTE)
+            for attr in query_attrs
+        ]).subquery("candidates")
+
+        # Exact weighted score over the candidates, same clipped cosine similarity as the other backends
+        similarities = {
+            attr: func.greatest(0.0, 1 - _embedding_column(attr).cosine_distance(query_embeddings[attr]))
+            for attr in query_attrs
+        }
+        weighted = [similarities[attr] * self.weights.get(attr, 1.0) for attr in query_attrs]
+        total = functools.reduce(operator.add, weighted).label("total_similarity")
+
+        return (
+            select(
+                embeddings_table.c.url,
+                connections_table.c.first_name,
+                connections_table.c.last_name,
+                connections_table.c.company,
+                connections_table.c.profile_data,
+                total,
+                *[similarities[attr].label(f"{attr}_score") for attr in query_attrs]
+            )
+            .select_from(
+                candidates
+                .join(embeddings_table, and_(
+                    embeddings_table.c.user_id == user_uuid, embeddings_table.c.url == candidates.c.url
+                ))
+                .join(connections_table, and_(
+                    connections_table.c.user_id == embeddings_table.c.user_id,
+                    connections_table.c.url == embeddings_table.c.url
+                ))
+            )
+            .order_by(total.desc())
+            .limit(n_results)
+        )
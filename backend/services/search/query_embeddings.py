@@ -0,0 +1,66 @@
+import threading
+import logging
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+from config.settings import get_embeddings
+from config.constants import QUERY_EMBEDDING_CACHE_MAX_ENTRIES
+from services.metrics import track_call
+
+logger = logging.getLogger(__name__)
+
+
+class QueryEmbeddingCache:
+    """Process-local LRU of embeddings for search query texts (missions and their attributes)"""
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embeddings for texts, calling the API only for ones not seen recently"""
+        with self._lock:
+            missing = list(dict.fromkeys(text for text in texts if text not in self._entries))
+        fetched = self._fetch(missing)
+        self._store(fetched)
+
+        found = {}
+        with self._lock:
+            for text in dict.fromkeys(texts):
+                vector = self._entries.get(text)
+                if vector is not None:
+                    self._entries.move_to_end(text)
+                    found[text] = vector
+
+        # Evicted by a concurrent store in between; rare, and fetched without holding the lock
+        evicted = [text for text in dict.fromkeys(texts) if text not in found and text not in fetched]
+        found.update(fetched)
+        found.update(self._fetch(evicted))
+        return [found[text].tolist() for text in texts]
+
+    def warm(self, texts: Iterable[str]) -> int:
+        """Embed texts ahead of time in one request; returns how many were new"""
+        with self._lock:
+            missing = list(dict.fromkeys(text for text in texts if text and text not in self._entries))
+        self._store(self._fetch(missing))
+        return len(missing)
+
+    @staticmethod
+    def _fetch(texts: List[str]) -> Dict[str, np.ndarray]:
+        if not texts:
+            return {}
+        with track_call("openai", "embeddings"):
+            embeddings = get_embeddings(texts)
+        # float32 keeps an entry at ~6 KB instead of ~50 KB of Python floats
+        return {text: np.asarray(embedding, dtype=np.float32) for text, embedding in zip(texts, embeddings)}
+
+    def _store(self, vectors: Dict[str, np.ndarray]):
+        with self._lock:
+            for text, vector in vectors.items():
+                self._entries[text] = vector
+                self._entries.move_to_end(text)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+query_embedding_cache = QueryEmbeddingCache(max_entries=QUERY_EMBEDDING_CACHE_MAX_ENTRIES)
@@ -0,0 +1,38 @@
+import logging
+from typing import Dict, List, Optional
+from config.constants import RERANKER_WEIGHTS, RERANK_CONFIDENCE_MARGIN, N_SUGGESTIONS
+
+logger = logging.getLogger(__name__)
+
+
+def rerank_connections(top_connections: List[Dict], mission_attributes: Dict[str, str]) -> List[Dict]:
+    """Re-score semantic matches with a linear model over per-attribute similarities"""
+    # Only attributes present in the mission count, normalized so scores stay on a 0-1 scale
+    active = [attr for attr in RERANKER_WEIGHTS if mission_attributes.get(attr, 'N/A') != 'N/A']
+    total_weight = sum(RERANKER_WEIGHTS[attr] for attr in active) or 1.0
+
+    reranked = []
+    for conn in top_connections:
+        scores = conn.get('attribute_scores', {})
+        rerank_score = sum(RERANKER_WEIGHTS[attr] * scores.get(attr, 0.0) for attr in active) / total_weight
+        reranked.append({**conn, 'rerank_score': rerank_score})
+
+    reranked.sort(key=lambda conn: conn['rerank_score'], reverse=True)
+    return reranked
+
+
+def rerank_gap(reranked: List[Dict], k: int = N_SUGGESTIONS) -> Optional[float]:
+    """Score gap between the last chosen and the first rejected candidate; None without a rejected one"""
+    if len(reranked) <= k:
+        return None
+    return reranked[k - 1]['rerank_score'] - reranked[k]['rerank_score']
+
+
+def is_decisive(reranked: List[Dict], k: int = N_SUGGESTIONS, margin: float = RERANK_CONFIDENCE_MARGIN) -> bool:
+    """True when the top k are separated from the rest by at least the confidence margin"""
+    # With k or fewer candidates there is no gap to measure, so the LLM still decides
+    gap = rerank_gap(reranked, k)
+    if gap is None:
+        return False
+    logger.info(f"Local rerank gap between #{k} and #{k + 1}: {gap:.4f} (margin {margin})")
+    return gap >= margin
@@ -0,0 +1,145 @@
+import os
+import logging
+import threading
+import multiprocessing
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from config.constants import (
+    SNAPSHOT_SCORE_CHUNK_ROWS,
+    SHARDED_SCORING_EXECUTOR,
+    SHARDED_SCORING_WORKERS,
+    SHARDED_SCORING_MIN_ROWS
+)
+
+logger = logging.getLogger(__name__)
+
+# Scored rows as (row indices, scores), best first
+TopRows = Tuple[np.ndarray, np.ndarray]
+
+
+def score_rows(matrices: Dict[str, np.ndarray], queries: Dict[str, np.ndarray], weights: Dict[str, float],
+               start: int, stop: int) -> np.ndarray:
+    """Weighted sum of clipped cosine similarities for rows [start, stop); queries must be normalized"""
+    totals = np.zeros(stop - start, dtype=np.float32)
+    for attr, query in queries.items():
+        matrix = matrices.get(attr)
+        if matrix is None:
+            continue
+        weight = weights.get(attr, 1.0)
+        for chunk in range(start, stop, SNAPSHOT_SCORE_CHUNK_ROWS):
+            block = matrix[chunk:min(chunk + SNAPSHOT_SCORE_CHUNK_ROWS, stop)]
+            if block.dtype != np.float32:
+                block = block.astype(np.float32)
+            similarity = np.maximum(block @ query, 0.0)
+            totals[chunk - start:chunk - start + len(similarity)] += similarity * weight
+    return totals
+
+
+def top_rows(totals: np.ndarray, k: int, offset: int = 0) -> TopRows:
+    k = min(k, len(totals))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    idx = np.argpartition(-totals, k - 1)[:k]
+    idx = idx[np.argsort(-totals[idx])]
+    return idx + offset, totals[idx]
+
+
+def _score_shard(matrices, queries, weights, start: int, stop: int, k: int) -> TopRows:
+    return top_rows(score_rows(matrices, queries, weights, start, stop), k, offset=start)
+
+
+# Worker-process side: snapshot files mapped once per process; the OS page cache
+# shares their pages with the API process and every other worker
+_worker_matrices: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+
+
+def _mapped_matrices(path: str, attributes: List[str]) -> Dict[str, np.ndarray]:
+    # Unmap versions write_user_snapshot has replaced, so their deleted files don't pin disk space
+    for key in [key for key in _worker_matrices if not os.path.isdir(key[0])]:
+        del _worker_matrices[key]
+
+    matrices = {}
+    for attr in attributes:
+        key = (path, attr)
+        if key in _worker_matrices:
+            _worker_matrices.move_to_end(key)
+        else:
+            _worker_matrices[key] = np.load(os.path.join(path, f"{attr}.npy"), mmap_mode="r")
+            while len(_worker_matrices) > 64:
+                _worker_matrices.popitem(last=False)
+        matrices[attr] = _worker_matrices[key]
+    return matrices
+
+
+def _score_shard_from_files(path: str, attributes: List[str], queries, weights, start: int, stop: int, k: int) -> TopRows:
+    return _score_shard(_mapped_matrices(path, attributes), queries, weights, start, stop, k)
+
+
+def _default_workers() -> int:
+    """CPU cores divided between the web workers (WEB_CONCURRENCY, as read by uvicorn), each of which has its own pool"""
+    web_workers = int(os.getenv("WEB_CONCURRENCY") or 1)
+    return max(1, (os.cpu_count() or 1) // max(1, web_workers))
+
+
+class ShardedScorer:
+    """Scores a large snapshot in row shards on a thread or process pool and merges the per-shard top-k
+
+    Threads work because NumPy releases the GIL inside the matrix products. Processes
+    sidestep the GIL entirely and map the snapshot files themselves, so only the query
+    vectors and each shard's top-k cross the process boundary. Run with OPENBLAS_NUM_THREADS=1
+    (or the equivalent for your BLAS) so the matrix products don't add their own threads on top.
+    """
+    def __init__(self, kind: Optional[str], workers: Optional[int], min_rows: int):
+        self.kind = kind
+        self.workers = workers or _default_workers()
+        self.min_rows = min_rows
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def applies(self, n_rows: int) -> bool:
+        return self.kind is not None and self.workers > 1 and n_rows >= self.min_rows
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    # spawn: forking a process that runs an event loop and client threads is unsafe
+                    self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+                else:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="snapshot-score")
+                logger.info(f"Started {self.kind} pool with {self.workers} workers for sharded scoring")
+            return self._executor
+
+    def top_k(self, path: str, matrices: Dict[str, np.ndarray], n_rows: int, queries: Dict[str, np.ndarray],
+              weights: Dict[str, float], k: int) -> TopRows:
+        # Shard boundaries on chunk multiples keep each worker's blocks full-sized
+        shard_rows = -(-n_rows // self.workers)
+        shard_rows = -(-shard_rows // SNAPSHOT_SCORE_CHUNK_ROWS) * SNAPSHOT_SCORE_CHUNK_ROWS
+        bounds = [(start, min(start + shard_rows, n_rows)) for start in range(0, n_rows, shard_rows)]
+
+        executor = self._get_executor()
+        if self.kind == "process":
+            attributes = [attr for attr in queries if attr in matrices]
+            futures = [
+                executor.submit(_score_shard_from_files, path, attributes, queries, weights, start, stop, k)
+                for start, stop in bounds
+            ]
+        else:
+            futures = [executor.submit(_score_shard, matrices, queries, weights, start, stop, k) for start, stop in bounds]
+
+        shards = [future.result() for future in futures]
+        idx = np.concatenate([shard_idx for shard_idx, _ in shards])
+        scores = np.concatenate([shard_scores for _, shard_scores in shards])
+        best, best_scores = top_rows(scores, k)
+        return idx[best], best_scores
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+sharded_scorer = ShardedScorer(SHARDED_SCORING_EXECUTOR, SHARDED_SCORING_WORKERS, SHARDED_SCORING_MIN_ROWS)
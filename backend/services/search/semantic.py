@@ -1,15 +1,18 @@
 import logging
 from typing import List, Dict, Any
-from config.settings import client, get_embeddings
+from config.settings import client
 from config.constants import N_RESULTS
+from services.metrics import span, track_call
 from .embeddings import EmbeddingManager
+from .snapshot import load_user_snapshot, UserSnapshot
+from .query_embeddings import query_embedding_cache
 
 logger = logging.getLogger(__name__)
 
 class SemanticSearch:
-    def __init__(self, user_id: str = None): 
+    def __init__(self, user_id: str = None, embedding_manager: EmbeddingManager = None): 
         self.user_id = user_id or "default"
-        self.embedding_manager = EmbeddingManager(user_id) 
+        self.embedding_manager = embedding_manager or EmbeddingManager(user_id) 
         
         self.weights = {
             'summary': 1,
@@ -33,12 +36,13 @@ class SemanticSearch:
         """
         
         try:
-            response = client.chat.completions.create(
-                model="gpt-4.1",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=200,
-                temperature=0.1
-            )
+            with track_call("openai", "chat_extract_attributes"):
+                response = client.chat.completions.create(
+                    model="gpt-4.1",
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=200,
+                    temperature=0.1
+                )
             
             import json
             attributes = json.loads(response.choices[0].message.content.strip())
@@ -57,8 +61,22 @@ class SemanticSearch:
                 'industry': 'N/A'
             }
     
-    def search_top_connections(self, mission_attributes: Dict[str, str], n_results: int = N_RESULTS) -> List[Dict]:
+    def preload(self) -> bool:
+        """Open and page in the user's vector snapshot ahead of the first search"""
+        snapshot = load_user_snapshot(self.user_id, self.embedding_manager.attributes)
+        if snapshot is None:
+            return False
+        snapshot.preload()
+        return True
+    
+    def search_top_connections(self, mission_attributes: Dict[str, str], n_results: int = N_RESULTS,
+                               query_embeddings: Dict[str, List[float]] = None) -> List[Dict]:
         """Search for top connections using semantic similarity across all attributes"""
+        query_embeddings = query_embeddings or {}
+        
+        snapshot = load_user_snapshot(self.user_id, self.embedding_manager.attributes)
+        if snapshot is not None:
+            return self._search_snapshot(snapshot, mission_attributes, n_results, query_embeddings)
         
         all_scores = {}
         
@@ -73,16 +91,17 @@ class SemanticSearch:
             try:
                 # embed the query_text
                 # query_embedding = embedding_model.encode([query_text])[0].tolist()
-                query_embedding = get_embeddings([query_text])[0]
+                query_embedding = query_embeddings.get(attr) or query_embedding_cache.embed([query_text])[0]
 
 
                 # get results for the whole collection
-                collection_size = self.embedding_manager.collections[attr].count()
-                results = self.embedding_manager.collections[attr].query(
-                    query_embeddings=query_embedding,
-                    n_results=collection_size,
-                    include=['distances', 'metadatas']
-                )
+                with track_call("chroma", "query"):
+                    collection_size = self.embedding_manager.collections[attr].count()
+                    results = self.embedding_manager.collections[attr].query(
+                        query_embeddings=query_embedding,
+                        n_results=collection_size,
+                        include=['distances', 'metadatas']
+                    )
 
                 # Check if results are empty
                 if not results['ids'] or not results['ids'][0]:
@@ -98,9 +117,11 @@ class SemanticSearch:
                     if conn_id not in all_scores:
                         all_scores[conn_id] = {
                             'total_similarity': 0,
+                            'attribute_scores': {},
                             'metadata': results['metadatas'][0][i]
                         }
                     all_scores[conn_id]['total_similarity'] += weighted_similarity
+                    all_scores[conn_id]['attribute_scores'][attr] = similarity
                     
             except Exception as e:
                 logger.error(f"Failed to search {attr} collection: {e}")
@@ -118,9 +139,45 @@ class SemanticSearch:
             {
                 'id': conn_id,
                 'similarity_score': data['total_similarity'],
+                'attribute_scores': data['attribute_scores'],
                 'name': data['metadata'].get('name', ''),
                 'company': data['metadata'].get('company', ''),
                 'url': data['metadata'].get('url', '')
             }
             for conn_id, data in sorted_connections
+        ]
+
+    def _search_snapshot(self, snapshot: UserSnapshot, mission_attributes: Dict[str, str], n_results: int,
+                         query_embeddings: Dict[str, List[float]]) -> List[Dict]:
+        """Score every connection against the memory-mapped snapshot instead of querying Chroma"""
+        query_attrs = [
+            attr for attr in self.embedding_manager.attributes
+            if mission_attributes.get(attr, 'N/A') != 'N/A'
+        ]
+        if not query_attrs or len(snapshot) == 0:
+            return []
+        
+        missing = [attr for attr in query_attrs if attr not in query_embeddings]
+        if missing:
+            query_embeddings = {
+                **query_embeddings,
+                **dict(zip(missing, query_embedding_cache.embed([mission_attributes[attr] for attr in missing])))
+            }
+        query_embeddings = {attr: query_embeddings[attr] for attr in query_attrs}
+        with span("search", "snapshot_score"):
+            top_idx, top_scores = snapshot.top_k(query_embeddings, self.weights, n_results)
+        attribute_scores = snapshot.attribute_scores(top_idx, query_embeddings)
+        
+        logger.info(f"Found {len(top_idx)} top connections out of {len(snapshot)} from vector snapshot")
+        
+        return [
+            {
+                'id': snapshot.ids[i],
+                'similarity_score': float(top_scores[rank]),
+                'attribute_scores': {attr: float(scores[rank]) for attr, scores in attribute_scores.items()},
+                'name': snapshot.metadatas[i].get('name', ''),
+                'company': snapshot.metadatas[i].get('company', ''),
+                'url': snapshot.metadatas[i].get('url', '')
+            }
+            for rank, i in enumerate(top_idx)
         ]
\ No newline at end of file
@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import uuid
+import fcntl
+import shutil
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+import numpy as np
+from typing import Dict, List, Any, Optional, Tuple
+from config.constants import SNAPSHOT_PATH, SNAPSHOT_DTYPE, SNAPSHOT_SCORE_CHUNK_ROWS
+from .scoring import score_rows, top_rows, sharded_scorer
+
+logger = logging.getLogger(__name__)
+
+CURRENT_POINTER = "CURRENT"
+STALE_MARKER = "STALE"
+LOCK_FILE = "LOCK"
+IDS_FILE = "ids.json"
+
+# Process-local handles to memory-mapped snapshots, keyed by user id
+_open_snapshots: Dict[str, "UserSnapshot"] = {}
+_open_lock = threading.Lock()
+
+
+class UserSnapshot:
+    """Read-only, memory-mapped vectors for one user (one matrix per attribute)"""
+    def __init__(self, user_id: str, version: str, path: str, attributes: List[str]):
+        self.user_id = user_id
+        self.version = version
+        self.path = path
+
+        with open(os.path.join(path, IDS_FILE)) as f:
+            table = json.load(f)
+        self.ids: List[str] = table["ids"]
+        self.metadatas: List[Dict[str, Any]] = table["metadatas"]
+
+        # np.load with mmap_mode maps the file without copying it, so every worker
+        # process shares the same pages through the OS page cache
+        self.matrices = {
+            attr: np.load(os.path.join(path, f"{attr}.npy"), mmap_mode="r")
+            for attr in attributes
+            if os.path.exists(os.path.join(path, f"{attr}.npy"))
+        }
+
+    def __len__(self):
+        return len(self.ids)
+
+    def top_k(self, query_embeddings: Dict[str, List[float]], weights: Dict[str, float], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Row indices and scores of the k best rows, best first (sharded across workers for large users)"""
+        queries = _queries(query_embeddings)
+        if sharded_scorer.applies(len(self.ids)):
+            return sharded_scorer.top_k(self.path, self.matrices, len(self.ids), queries, weights, k)
+        return top_rows(score_rows(self.matrices, queries, weights, 0, len(self.ids)), k)
+
+    def preload(self):
+        """Fault the matrices into the page cache so the first search doesn't wait on disk"""
+        for matrix in self.matrices.values():
+            for start in range(0, len(matrix), SNAPSHOT_SCORE_CHUNK_ROWS):
+                np.asarray(matrix[start:start + SNAPSHOT_SCORE_CHUNK_ROWS]).sum()
+
+    def attribute_scores(self, rows: np.ndarray, query_embeddings: Dict[str, List[float]]) -> Dict[str, np.ndarray]:
+        """Unweighted clipped cosine similarity per attribute for a few selected rows"""
+        scores = {}
+        for attr, embedding in query_embeddings.items():
+            matrix = self.matrices.get(attr)
+            if matrix is None:
+                continue
+            query = _normalize(np.asarray(embedding, dtype=np.float32))
+            scores[attr] = np.maximum(np.asarray(matrix[rows], dtype=np.float32) @ query, 0.0)
+        return scores
+
+
+def _queries(query_embeddings: Dict[str, List[float]]) -> Dict[str, np.ndarray]:
+    return {attr: _normalize(np.asarray(embedding, dtype=np.float32)) for attr, embedding in query_embeddings.items()}
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _user_dir(user_id: str) -> str:
+    return os.path.join(SNAPSHOT_PATH, f"user_{user_id}")
+
+
+def _read_file(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _read_current_version(user_id: str) -> Optional[str]:
+    return _read_file(os.path.join(_user_dir(user_id), CURRENT_POINTER))
+
+
+def _version_time(version: str) -> int:
+    # Versions are "<milliseconds>-<unique suffix>"
+    try:
+        return int(version.split("-", 1)[0])
+    except ValueError:
+        return -1
+
+
+@contextmanager
+def _user_lock(user_dir: str):
+    """Serializes pointer swaps and pruning between writers in any process"""
+    with open(os.path.join(user_dir, LOCK_FILE), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def write_user_snapshot(user_id: str, collections: Dict[str, Any], attributes: List[str]) -> bool:
+    """Dump a user's Chroma collections into flat .npy matrices plus an ID table"""
+    try:
+        user_dir = _user_dir(user_id)
+        # Taken before reading, so a later version has seen at least as much of the live store
+        started = int(time.time() * 1000)
+        # Writes that land while this one reads the collections leave the snapshot stale
+        stale_token = _read_file(os.path.join(user_dir, STALE_MARKER))
+
+        rows = {}
+        metadatas = {}
+        for attr in attributes:
+            result = collections[attr].get(include=["embeddings", "metadatas"])
+            rows[attr] = dict(zip(result["ids"], result["embeddings"]))
+            for conn_id, metadata in zip(result["ids"], result["metadatas"]):
+                metadatas.setdefault(conn_id, metadata)
+
+        ids = sorted(metadatas)
+        if not ids:
+            return False
+
+        os.makedirs(user_dir, exist_ok=True)
+        # Unique even when two writers start in the same millisecond
+        version_dir = tempfile.mkdtemp(prefix=f"{started}-", dir=user_dir)
+        version = os.path.basename(version_dir)
+
+        for attr in attributes:
+            vectors = rows[attr]
+            if not vectors:
+                continue
+            dim = len(next(iter(vectors.values())))
+            # Rows missing for an attribute stay zero, i.e. contribute no similarity
+            matrix = np.zeros((len(ids), dim), dtype=np.float32)
+            for i, conn_id in enumerate(ids):
+                if conn_id in vectors:
+                    matrix[i] = vectors[conn_id]
+            np.save(os.path.join(version_dir, f"{attr}.npy"), _normalize(matrix).astype(SNAPSHOT_DTYPE))
+
+        with open(os.path.join(version_dir, IDS_FILE), "w") as f:
+            json.dump({"ids": ids, "metadatas": [metadatas[conn_id] for conn_id in ids]}, f)
+
+        with _user_lock(user_dir):
+            current = _read_current_version(user_id)
+            if current is not None and _version_time(current) > _version_time(version):
+                # A writer that started later already published
+                shutil.rmtree(version_dir, ignore_errors=True)
+                return True
+
+            # Swap the pointer atomically so readers never see a half-written snapshot
+            pointer_tmp = os.path.join(user_dir, f"{CURRENT_POINTER}.tmp")
+            with open(pointer_tmp, "w") as f:
+                f.write(version)
+            os.replace(pointer_tmp, os.path.join(user_dir, CURRENT_POINTER))
+
+            if stale_token is not None and _read_file(os.path.join(user_dir, STALE_MARKER)) == stale_token:
+                os.remove(os.path.join(user_dir, STALE_MARKER))
+
+            # Only older versions can go: newer ones may still be being written. Open mmaps
+            # keep their pages alive until closed
+            for entry in os.listdir(user_dir):
+                entry_path = os.path.join(user_dir, entry)
+                if os.path.isdir(entry_path) and _version_time(entry) < _version_time(version):
+                    shutil.rmtree(entry_path, ignore_errors=True)
+
+        logger.info(f"User {user_id}: wrote vector snapshot {version} with {len(ids)} connections")
+        return True
+
+    except Exception as e:
+        logger.error(f"Failed to write vector snapshot for user {user_id}: {e}")
+        return False
+
+
+def mark_user_snapshot_stale(user_id: str):
+    """Flag that the live store has changes the snapshot lacks; searches keep using it until rewritten"""
+    user_dir = _user_dir(user_id)
+    if not os.path.isdir(user_dir):
+        return
+    # A fresh token per change, so a writer only clears the marker if nothing changed while it ran
+    with open(os.path.join(user_dir, STALE_MARKER), "w") as f:
+        f.write(uuid.uuid4().hex)
+
+
+def load_user_snapshot(user_id: str, attributes: List[str]) -> Optional[UserSnapshot]:
+    """Return the memory-mapped snapshot for a user, reopening it if a newer one was written"""
+    version = _read_current_version(user_id)
+    if version is None:
+        return None
+
+    with _open_lock:
+        snapshot = _open_snapshots.get(user_id)
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+    try:
+        snapshot = UserSnapshot(user_id, version, os.path.join(_user_dir(user_id), version), attributes)
+    except Exception as e:
+        logger.warning(f"Could not open vector snapshot for user {user_id}: {e}")
+        return None
+
+    with _open_lock:
+        _open_snapshots[user_id] = snapshot
+    return snapshot
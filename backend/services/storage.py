@@ -1,81 +1,282 @@
 from sqlmodel import select
-from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy import text
-from config.database import get_session
-from models.database import UserConnection
-from typing import Dict, List
-from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy import text, update, delete, func, literal_column
+from config.database import engine, get_session, get_read_session
+from models.database import UserConnection, ProfileCache, RefreshBudget, ReasoningJob
+from models.connection import Connection, BASE_FIELDS, ROW_METADATA_FIELDS
+from services.metrics import track_call
+from services.connection_cache import connection_cache
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from contextlib import asynccontextmanager
 import logging
 
 logger = logging.getLogger(__name__)
 
-async def load_enriched_cache(user_id: str) -> Dict[str, dict]:
-    """Load user's connections from database"""
-    async with get_session() as session:
+def _insert_for(session):
+    """Dialect-specific INSERT supporting ON CONFLICT (SQLite is used by the offline benchmarks)"""
+    if session.bind.dialect.name == "sqlite":
+        return sqlite_insert
+    return pg_insert
+
+# Columns read into Connection.from_row, in its argument order
+_CONNECTION_COLUMNS = (
+    [getattr(UserConnection, field) for field in BASE_FIELDS] + [UserConnection.profile_data, UserConnection.updated_at]
+)
+
+def _connection_from_row(conn: UserConnection) -> Connection:
+    return Connection.from_row(*(getattr(conn, field) for field in BASE_FIELDS), conn.profile_data, conn.updated_at)
+
+def _profile_data(conn_data) -> dict:
+    """Everything except the base columns, stored in profile_data JSONB"""
+    if isinstance(conn_data, Connection):
+        return conn_data.profile_data()
+    return {k: v for k, v in conn_data.items() if k not in BASE_FIELDS and k not in ROW_METADATA_FIELDS}
+
+# Statement builders shared with the query plan check (migrations.plan_check)
+def user_connections_query(user_id: str):
+    # Plain columns skip ORM identity-map bookkeeping for what is often tens of thousands of rows
+    return select(*_CONNECTION_COLUMNS).where(UserConnection.user_id == user_id)
+
+def user_connections_version_query(user_id: str):
+    return select(func.count(), func.max(UserConnection.updated_at)).where(UserConnection.user_id == user_id)
+
+# Increment profile_data.suggestion_count in place, so concurrent updates can't lose counts
+_INCREMENT_SUGGESTION_COUNT = {
+    "postgresql": (
+        "jsonb_set(coalesce(profile_data, '{}'::jsonb), '{suggestion_count}', "
+        "to_jsonb(coalesce((profile_data->>'suggestion_count')::int, 0) + 1))"
+    ),
+    "sqlite": (
+        "json_set(coalesce(profile_data, '{}'), '$.suggestion_count', "
+        "coalesce(json_extract(profile_data, '$.suggestion_count'), 0) + 1)"
+    ),
+}
+
+def suggestion_hits_update(user_id: str, urls: List[str], dialect: str = "postgresql"):
+    return (
+        update(UserConnection)
+        .where(UserConnection.user_id == user_id, UserConnection.url.in_(urls))
+        .values(profile_data=literal_column(_INCREMENT_SUGGESTION_COUNT[dialect]))
+    )
+
+def stale_connections_query(cutoff: datetime, limit: int):
+    return (
+        select(UserConnection)
+        .where(UserConnection.enriched == True, UserConnection.updated_at < cutoff)  # noqa: E712
+        .order_by(UserConnection.updated_at)
+        .limit(limit)
+    )
+
+def cached_profiles_query(urls: List[str], cutoff: datetime):
+    return select(ProfileCache).where(ProfileCache.url.in_(urls), ProfileCache.fetched_at >= cutoff)
+
+async def load_enriched_cache(user_id: str, read_only: bool = False) -> Dict[str, Connection]:
+    """Load user's connections from database
+
+    With read_only=True the result may come from the process-local connection cache
+    and is shared with other requests, so callers must not modify it. Read-only loads
+    use the interactive read pool (and replica), so they may trail very recent writes.
+    """
+    async with (get_read_session() if read_only else get_session()) as session:
+        if read_only and connection_cache.enabled:
+            with track_call("postgres", "connections_version"):
+                version = tuple((await session.execute(user_connections_version_query(user_id))).one())
+            cached = connection_cache.get(user_id, version)
+            if cached is not None:
+                return cached
+
         # Use execute() instead of exec()
-        statement = select(UserConnection).where(UserConnection.user_id == user_id)
-        result = await session.execute(statement)
-        connections = result.scalars().all()
-        
-        # Convert to current cache format
-        cache = {}
-        for conn in connections:
-            cache[conn.url] = {
-                "first_name": conn.first_name,
-                "last_name": conn.last_name,
-                "url": conn.url,
-                "company": conn.company,
-                "position": conn.position,
-                "email": conn.email,
-                "connected_on": conn.connected_on,
-                "enriched": conn.enriched,
-                **conn.profile_data  # Spread enriched data
-            }
+        statement = user_connections_query(user_id)
+        with track_call("postgres", "load_connections"):
+            result = await session.execute(statement)
+            cache = {row.url: Connection.from_row(*row) for row in result}
+
+        if read_only and connection_cache.enabled:
+            connection_cache.store(user_id, version, cache)
         return cache
 
 async def save_enriched_cache(user_id: str, cache: Dict[str, dict]):
     """Save connections to database"""
+    connection_cache.invalidate(user_id)
     async with get_session() as session:
-        for url, conn_data in cache.items():
-            # Separate base fields from profile data
-            base_fields = {
-                'user_id': user_id,
-                'url': url,
-                'first_name': conn_data.get('first_name', ''),
-                'last_name': conn_data.get('last_name', ''),
-                'company': conn_data.get('company'),
-                'position': conn_data.get('position'),
-                'email': conn_data.get('email'),
-                'connected_on': conn_data.get('connected_on'),
-                'enriched': conn_data.get('enriched', False),
-                'updated_at': datetime.utcnow()
-            }
+        with track_call("postgres", "save_connections"):
+            for url, conn_data in cache.items():
+                # Separate base fields from profile data
+                base_fields = {
+                    'user_id': user_id,
+                    'url': url,
+                    'first_name': conn_data.get('first_name', ''),
+                    'last_name': conn_data.get('last_name', ''),
+                    'company': conn_data.get('company'),
+                    'position': conn_data.get('position'),
+                    'email': conn_data.get('email'),
+                    'connected_on': conn_data.get('connected_on'),
+                    'enriched': conn_data.get('enriched', False),
+                    'updated_at': datetime.utcnow()
+                }
             
-            # Everything else goes in profile_data JSONB
-            profile_data = {k: v for k, v in conn_data.items() 
-                          if k not in ['first_name', 'last_name', 'url', 'company', 'position', 'email', 'connected_on', 'enriched', 'user_id']}
-            base_fields['profile_data'] = profile_data
+                # Everything else goes in profile_data JSONB
+                base_fields['profile_data'] = _profile_data(conn_data)
             
-            # Upsert (insert or update)
-            stmt = insert(UserConnection).values(**base_fields)
-            stmt = stmt.on_conflict_do_update(
-                index_elements=['user_id', 'url'],
-                set_=dict(
-                    first_name=stmt.excluded.first_name,
-                    last_name=stmt.excluded.last_name,
-                    company=stmt.excluded.company,
-                    position=stmt.excluded.position,
-                    enriched=stmt.excluded.enriched,
-                    profile_data=stmt.excluded.profile_data,
-                    updated_at=stmt.excluded.updated_at
+                # Upsert (insert or update)
+                stmt = _insert_for(session)(UserConnection).values(**base_fields)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['user_id', 'url'],
+                    set_=dict(
+                        first_name=stmt.excluded.first_name,
+                        last_name=stmt.excluded.last_name,
+                        company=stmt.excluded.company,
+                        position=stmt.excluded.position,
+                        enriched=stmt.excluded.enriched,
+                        profile_data=stmt.excluded.profile_data,
+                        updated_at=stmt.excluded.updated_at
+                    )
                 )
-            )
-            await session.execute(stmt)  # Use execute() instead of exec()
+                await session.execute(stmt)  # Use execute() instead of exec()
         
-        await session.commit()
+            await session.commit()
 
 async def save_connections_list(user_id: str, connections: List[dict]):
     """Save basic connections list (for compatibility)"""
     # Convert to cache format and save
     cache = {conn['url']: conn for conn in connections}
-    await save_enriched_cache(user_id, cache)
\ No newline at end of file
+    await save_enriched_cache(user_id, cache)
+
+async def load_stale_connections(min_age_days: int, limit: int) -> List[Tuple[str, Connection, datetime]]:
+    """Enriched connections (across all users) not updated for at least min_age_days, oldest first"""
+    cutoff = datetime.utcnow() - timedelta(days=min_age_days)
+    async with get_session() as session:
+        statement = stale_connections_query(cutoff, limit)
+        with track_call("postgres", "load_stale_connections"):
+            result = await session.execute(statement)
+            connections = result.scalars().all()
+        return [(str(conn.user_id), _connection_from_row(conn), conn.updated_at) for conn in connections]
+
+async def record_suggestion_hits(user_id: str, urls: List[str]):
+    """Count how often connections are suggested (used to prioritize profile refreshes)"""
+    if not urls:
+        return
+    # The connection cache is left alone: suggestion counts only feed profile refresh, which reads the database
+    async with get_session() as session:
+        with track_call("postgres", "record_suggestion_hits"):
+            # One atomic UPDATE; leaves updated_at alone, it tracks profile freshness, not popularity
+            await session.execute(suggestion_hits_update(user_id, urls, session.bind.dialect.name))
+            await session.commit()
+
+async def load_cached_profiles(urls: List[str], ttl_days: int) -> Dict[str, dict]:
+    """Shared enriched profile fields for the given URLs, skipping entries older than the TTL"""
+    cutoff = datetime.utcnow() - timedelta(days=ttl_days)
+    profiles = {}
+    async with get_session() as session:
+        with track_call("postgres", "load_cached_profiles"):
+            # Chunk the IN list to keep statements a reasonable size
+            for i in range(0, len(urls), 1000):
+                statement = cached_profiles_query(urls[i:i + 1000], cutoff)
+                result = await session.execute(statement)
+                for entry in result.scalars().all():
+                    profiles[entry.url] = entry.profile_data
+    return profiles
+
+async def save_cached_profiles(profiles: Dict[str, dict]):
+    """Upsert freshly fetched profile fields into the shared cache"""
+    if not profiles:
+        return
+    async with get_session() as session:
+        with track_call("postgres", "save_cached_profiles"):
+            for url, profile_data in profiles.items():
+                stmt = _insert_for(session)(ProfileCache).values(
+                    url=url, profile_data=profile_data, fetched_at=datetime.utcnow()
+                )
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['url'],
+                    set_=dict(profile_data=stmt.excluded.profile_data, fetched_at=stmt.excluded.fetched_at)
+                )
+                await session.execute(stmt)
+            await session.commit()
+
+# Arbitrary key for the session-level advisory lock that lets one worker at a time refresh profiles
+REFRESH_LOCK_KEY = 7243020
+
+@asynccontextmanager
+async def refresh_lock():
+    """Yield whether this process holds the cluster-wide profile refresh lock"""
+    async with engine.connect() as conn:
+        if conn.dialect.name != "postgresql":
+            yield True
+            return
+        acquired = (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": REFRESH_LOCK_KEY})).scalar()
+        # The lock belongs to the session, so end the transaction rather than sit idle in it
+        await conn.commit()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": REFRESH_LOCK_KEY})
+                await conn.commit()
+
+async def reserve_refresh_budget(wanted: int, daily_limit: int) -> int:
+    """Take up to `wanted` refresh calls from today's shared budget; returns how many were granted"""
+    today = date.today()
+    async with get_session() as session:
+        with track_call("postgres", "reserve_refresh_budget"):
+            stmt = _insert_for(session)(RefreshBudget).values(day=today, used=0).on_conflict_do_nothing(index_elements=['day'])
+            await session.execute(stmt)
+            # Row lock serializes workers reserving at the same time (SQLite locks the whole database anyway)
+            used = (await session.execute(
+                select(RefreshBudget.used).where(RefreshBudget.day == today).with_for_update()
+            )).scalar_one()
+            granted = max(0, min(wanted, daily_limit - used))
+            if granted:
+                await session.execute(
+                    update(RefreshBudget).where(RefreshBudget.day == today).values(used=RefreshBudget.used + granted)
+                )
+            await session.commit()
+    return granted
+
+async def release_refresh_budget(unused: int):
+    """Give back reserved calls that were not spent"""
+    if unused <= 0:
+        return
+    async with get_session() as session:
+        await session.execute(
+            update(RefreshBudget).where(RefreshBudget.day == date.today()).values(used=RefreshBudget.used - unused)
+        )
+        await session.commit()
+
+async def create_reasoning_job(reasoning_id: str, user_id: str, suggestions: List[dict], ttl_hours: int):
+    """Store a pending reasoning job, pruning ones older than the TTL"""
+    async with get_session() as session:
+        with track_call("postgres", "create_reasoning_job"):
+            cutoff = datetime.utcnow() - timedelta(hours=ttl_hours)
+            await session.execute(delete(ReasoningJob).where(ReasoningJob.created_at < cutoff))
+            await session.execute(
+                _insert_for(session)(ReasoningJob).values(
+                    id=reasoning_id, user_id=user_id, status="pending",
+                    suggestions=suggestions, created_at=datetime.utcnow()
+                )
+            )
+            await session.commit()
+
+async def update_reasoning_job(reasoning_id: str, status: str, suggestions: Optional[List[dict]] = None):
+    values = {"status": status}
+    if suggestions is not None:
+        values["suggestions"] = suggestions
+    async with get_session() as session:
+        with track_call("postgres", "update_reasoning_job"):
+            await session.execute(update(ReasoningJob).where(ReasoningJob.id == reasoning_id).values(**values))
+            await session.commit()
+
+async def load_reasoning_job(reasoning_id: str, user_id: str) -> Optional[dict]:
+    """The job as {status, suggestions}, or None if it doesn't exist or belongs to another user"""
+    # Polled right after the request that created it, so read the primary rather than a replica
+    async with get_session() as session:
+        with track_call("postgres", "load_reasoning_job"):
+            row = (await session.execute(
+                select(ReasoningJob.status, ReasoningJob.suggestions)
+                .where(ReasoningJob.id == reasoning_id, ReasoningJob.user_id == user_id)
+            )).first()
+    if row is None:
+        return None
+    return {"status": row.status, "suggestions": row.suggestions}
@@ -3,7 +3,7 @@ import { BrowserRouter as Router, Routes, Route, Navigate } from 'react-router-d
 import { AuthProvider, useAuth } from './contexts/AuthContext';
 import LandingPage from './pages/LandingPage';
 import ProtectedRoute from './components/ProtectedRoute';
-import { getSuggestions } from './services/api';
+import { getSuggestions, getSuggestionReasoning } from './services/api';
 import { 
   FileUploadSection,
   MissionSection,
@@ -71,10 +71,26 @@ function Dashboard() {
     try {
       const response = await getSuggestions(mission);
       setSuggestions(response);
+      setSuggestionsLoading(false);
+      if (response.reasoning_pending) {
+        await pollSuggestionReasoning(response);
+      }
     } catch (err) {
       setError('Failed to get suggestions: ' + (err.response?.data?.detail || err.message));
+      setSuggestionsLoading(false);
+    }
+  };
+
+  // Suggestions picked by the local re-ranker arrive first; their reasoning follows
+  const pollSuggestionReasoning = async (response) => {
+    for (let attempt = 0; attempt < 30; attempt++) {
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+      const job = await getSuggestionReasoning(response.reasoning_id);
+      if (job.status !== 'pending') {
+        setSuggestions({ ...response, suggestions: job.suggestions, reasoning_pending: false });
+        return;
+      }
     }
-    setSuggestionsLoading(false);
   };
 
   const onGenerateMessage = (suggestion) => {
@@ -27,11 +27,15 @@ const SuggestionsSection = ({ suggestions, onGenerateMessage, onOpenLinkedInProf
                 
                 <div className="mb-2">
                   <span className="font-medium text-gray-700">Why they're relevant:</span>
-                  <p className="text-gray-600 mt-1">{suggestion.reasoning}</p>
+                  <p className="text-gray-600 mt-1">
+                    {suggestion.reasoning || (suggestions.reasoning_pending ? 'Writing reasoning…' : '')}
+                  </p>
                 </div>
                 <div className="mb-4">
                   <span className="font-medium text-gray-700">How they can help:</span>
-                  <p className="text-gray-600 mt-1">{suggestion.how_they_help}</p>
+                  <p className="text-gray-600 mt-1">
+                    {suggestion.how_they_help || (suggestions.reasoning_pending ? 'Writing reasoning…' : '')}
+                  </p>
                 </div>
                 
                 {/* Action Buttons */}
@@ -55,6 +55,11 @@ export const getSuggestions = async (mission) => {
   return response.data;
 };
 
+export const getSuggestionReasoning = async (reasoningId) => {
+  const response = await apiClient.get(`/suggestion-reasoning/${reasoningId}`);
+  return response.data;
+};
+
 export const generateMessage = async (messageData) => {
   const response = await apiClient.post('/generate-message', messageData);
   return response.data;